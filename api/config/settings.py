@@ -1,6 +1,6 @@
 import os
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -17,6 +17,20 @@ class Settings:
     # Server Configuration
     HOST: str = os.getenv("HOST", "0.0.0.0")
     PORT: int = int(os.getenv("PORT", "8000"))
+    # Each worker runs its own Chromium - leave half the cores for the browser processes.
+    # In-memory caches are per worker; screenshot memory hits check the file still exists
+    # when WORKERS > 1, so cache deletes made through any worker are seen by all of them
+    WORKERS: int = int(os.getenv("WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    
+    # Public URL - explicit BASE_URL override or local development HOST:PORT
+    BASE_URL: str = os.getenv("BASE_URL") or f"http://{HOST}:{PORT}"
+    SHORT_URL_PREFIX: str = f"{BASE_URL}/s/"
+    
+    # CORS Configuration (comma-separated list of allowed origins)
+    CORS_ORIGINS: List[str] = [
+        origin.strip() for origin in os.getenv("CORS_ORIGINS", "*").split(",") if origin.strip()
+    ]
        
     # Directory Configuration
     CACHE_DIR: Path = Path("cache")
@@ -28,26 +42,50 @@ class Settings:
     MAX_HEIGHT: int = int(os.getenv("MAX_HEIGHT", "1080"))
     DEFAULT_WIDTH: int = 1280
     DEFAULT_HEIGHT: int = 720
+    # Requested timestamps are rounded to this step (seconds) so near-identical frames share one capture
+    SCREENSHOT_TIMESTAMP_STEP: float = float(os.getenv("SCREENSHOT_TIMESTAMP_STEP", "0.5"))
+    # Pillow resize filter: bilinear, bicubic, lanczos, or auto (bilinear up to 2x downscale, lanczos beyond)
+    SCREENSHOT_RESIZE_FILTER: str = os.getenv("SCREENSHOT_RESIZE_FILTER", "auto").lower()
     
     # Cache Configuration
     CACHE_EXPIRY: int = int(os.getenv("CACHE_EXPIRY", "86400"))  # 24 hours
+    SCREENSHOT_MEMORY_CACHE_BYTES: int = int(os.getenv("SCREENSHOT_MEMORY_CACHE_BYTES", str(64 * 1024 * 1024)))  # per worker
+    METADATA_CACHE_EXPIRY: int = int(os.getenv("METADATA_CACHE_EXPIRY", "21600"))  # 6 hours
+    METADATA_MEMORY_CACHE_TTL: int = int(os.getenv("METADATA_MEMORY_CACHE_TTL", "3600"))  # 1 hour
+    METADATA_MEMORY_CACHE_SIZE: int = int(os.getenv("METADATA_MEMORY_CACHE_SIZE", "1024"))
+    LINK_MEMORY_CACHE_TTL: int = int(os.getenv("LINK_MEMORY_CACHE_TTL", "60"))  # seconds; other workers' clicks show up after this
+    LINK_MEMORY_CACHE_SIZE: int = int(os.getenv("LINK_MEMORY_CACHE_SIZE", "4096"))
+    LINK_WARMUP_COUNT: int = int(os.getenv("LINK_WARMUP_COUNT", "256"))  # most recent links preloaded at startup, 0 to skip
+    METADATA_HTTP_TIMEOUT: float = float(os.getenv("METADATA_HTTP_TIMEOUT", "5"))
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379")
+    REDIS_MAX_CONNECTIONS: int = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+    REDIS_RETRY_INTERVAL: float = float(os.getenv("REDIS_RETRY_INTERVAL", "10"))  # seconds between reconnect attempts
+    REDIS_CONNECT_TIMEOUT: float = float(os.getenv("REDIS_CONNECT_TIMEOUT", "2"))  # seconds, so an unreachable Redis fails fast
+    CLICK_FLUSH_INTERVAL: float = float(os.getenv("CLICK_FLUSH_INTERVAL", "5"))
     
     # Browser Configuration
     BROWSER_TIMEOUT: int = int(os.getenv("BROWSER_TIMEOUT", "30000"))
+    SCREENSHOT_TIMEOUT: float = float(os.getenv("SCREENSHOT_TIMEOUT", "25"))  # seconds a capture may hold a browser slot
+    MAX_CONCURRENT_CONTEXTS: int = int(os.getenv("MAX_CONCURRENT_CONTEXTS", "4"))
+    MAX_WARM_CONTEXTS_PER_KEY: int = int(os.getenv("MAX_WARM_CONTEXTS_PER_KEY", "4"))
+    MAX_WARM_CONTEXTS: int = int(os.getenv("MAX_WARM_CONTEXTS", "16"))  # across all keys, least recently used closed first
+    CONTEXT_REUSE_LIMIT: int = int(os.getenv("CONTEXT_REUSE_LIMIT", "20"))  # uses per warm context
+    # CDP endpoint of a Chromium shared by all workers (see shared_browser.py); unset to launch per worker
+    BROWSER_CDP_ENDPOINT: Optional[str] = os.getenv("BROWSER_CDP_ENDPOINT") or None
+    # Hardware video decode - needs a GPU host and the full Chromium build (playwright install chromium)
+    BROWSER_GPU: bool = os.getenv("BROWSER_GPU", "false").lower() in ("1", "true", "yes")
+    BROWSER_RECYCLE_AFTER: int = int(os.getenv("BROWSER_RECYCLE_AFTER", "100"))  # contexts per browser
+    BROWSER_MAX_AGE: int = int(os.getenv("BROWSER_MAX_AGE", "1800"))  # seconds per browser
+    # Player page loaded at startup so warm screenshot contexts have its scripts cached; empty to skip
+    SCREENSHOT_WARMUP_URL: str = os.getenv("SCREENSHOT_WARMUP_URL", "https://www.youtube.com/embed/jNQXAC9IVRw")
+    # YouTube frames via yt-dlp + ffmpeg when both are installed; the browser is the fallback
+    DIRECT_CAPTURE: bool = os.getenv("DIRECT_CAPTURE", "true").lower() in ("1", "true", "yes")
+    DIRECT_CAPTURE_TIMEOUT: float = float(os.getenv("DIRECT_CAPTURE_TIMEOUT", "15"))
+    # Stream URL lookups: seconds per lookup (also yt-dlp's socket timeout) and lookups at once
+    DIRECT_CAPTURE_RESOLVE_TIMEOUT: float = float(os.getenv("DIRECT_CAPTURE_RESOLVE_TIMEOUT", "10"))
+    DIRECT_CAPTURE_RESOLVE_CONCURRENCY: int = int(os.getenv("DIRECT_CAPTURE_RESOLVE_CONCURRENCY", "2"))
     USER_AGENT: str = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
 
-    @property
-    def BASE_URL(self) -> str:
-        """Get BASE_URL from environment or construct from HOST:PORT."""
-        # Check for explicit BASE_URL override
-        base_url = os.getenv("BASE_URL")
-        if base_url:
-            return base_url
-            
-        # Default to local development
-        return f"http://{self.HOST}:{self.PORT}"
- 
     def __init__(self):
         """Initialize settings and create required directories."""
         self.CACHE_DIR.mkdir(exist_ok=True)
@@ -1,32 +1,92 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager, suppress
+from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pathlib import Path
 from .config.settings import settings
 from .routers import health, screenshots, links
+from .services.browser_pool import browser_pool
+from .services.link import link_service
+from .services.metadata import metadata_service
+from .services.screenshot import screenshot_service
+from .services.storage import storage_service
+from .utils.log import configure_logging
+from .utils.static import CacheStaticFiles, IndexPage, SPAStaticFiles
+
+configure_logging(settings.LOG_LEVEL)
 
 # Get the project root directory (parent of api/)
 PROJECT_ROOT = Path(__file__).parent.parent
 STATIC_DIR = PROJECT_ROOT / "static"
 ASSETS_DIR = STATIC_DIR / "assets"
 
+# Read-only public paths answered by the preflight fast path; /cache/ also
+# has DELETE routes, so only GET and HEAD preflights take the fast path
+PUBLIC_STATIC_PREFIXES = ("/cache/", "/static/", "/assets/")
+PREFLIGHT_FAST_METHODS = ("GET", "HEAD")
+PREFLIGHT_HEADERS = {
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "GET, HEAD, OPTIONS",
+    "Access-Control-Max-Age": "86400"
+}
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Share Redis and a warm browser and run the click flusher for the app lifetime."""
+    app.state.redis = await storage_service.connect()
+    await browser_pool.warm_up()
+    # Loading the player page takes seconds - serve requests meanwhile
+    player_warm_up = asyncio.create_task(screenshot_service.warm_up())
+    link_warm_up = asyncio.create_task(storage_service.warm_up_links())
+    click_flusher = asyncio.create_task(link_service.run_click_flusher())
+    yield
+    for task in (player_warm_up, link_warm_up, click_flusher):
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    await link_service.flush_clicks()
+    await browser_pool.close()
+    await metadata_service.close()
+    await screenshot_service.close()
+    await storage_service.close()
+
+
 # Create FastAPI application
 app = FastAPI(
     title=settings.TITLE,
     description=settings.DESCRIPTION,
-    version=settings.VERSION
+    version=settings.VERSION,
+    lifespan=lifespan
 )
 
+# The SPA shell only changes between deploys - keep it in memory
+index_page = IndexPage.load(STATIC_DIR / "index.html")
+app.state.index_page = index_page
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=settings.CORS_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def static_preflight(request: Request, call_next):
+    """Answer read-only preflights for public static paths before CORS and routing."""
+    if (
+        request.method == "OPTIONS"
+        and "*" in settings.CORS_ORIGINS
+        and request.url.path.startswith(PUBLIC_STATIC_PREFIXES)
+        and request.headers.get("access-control-request-method", "").upper() in PREFLIGHT_FAST_METHODS
+    ):
+        return Response(status_code=204, headers=PREFLIGHT_HEADERS)
+    return await call_next(request)
+
 # Mount static files - serve assets directly and static files
 app.mount("/assets", StaticFiles(directory=str(ASSETS_DIR)), name="assets")
 app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
@@ -44,12 +104,26 @@ async def serve_favicon():
 async def serve_manifest():
     return FileResponse(STATIC_DIR / "favicon" / "site.webmanifest")
 
-# Include routers - order matters! API routes first, then catch-all frontend route
+# Include routers - order matters! API routes first, then the frontend mount
 app.include_router(screenshots.router, tags=["Screenshots"])
 app.include_router(links.router, tags=["Links"])
-app.include_router(health.router, tags=["Health"])  # Health router with catch-all must be last
+app.include_router(health.router, tags=["Health"])
+
+# Cached screenshots are served from disk; mounted after the routers so DELETE /cache/{key} still matches
+app.mount("/cache", CacheStaticFiles(directory=str(settings.CACHE_DIR)), name="cache")
+
+# Serve the React build for everything else - must be mounted last
+app.mount("/", SPAStaticFiles(directory=str(STATIC_DIR), html=True, index_page=index_page), name="frontend")
 
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host=settings.HOST, port=settings.PORT)
+    uvicorn.run(
+        app,
+        host=settings.HOST,
+        port=settings.PORT,
+        loop="uvloop",
+        http="httptools",
+        log_level="warning",
+        access_log=False
+    )
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Request
 from fastapi.responses import JSONResponse, FileResponse
-from pathlib import Path
 from ..config.settings import settings
+from ..services.browser_pool import browser_pool
+from ..services.screenshot import image_backend
 
 router = APIRouter()
 
@@ -30,30 +31,23 @@ async def api_info():
             "shorten": "/shorten",
             "resolve": "/s/{short_id}",
             "cache": "/cache/{cache_key}",
-            "health": "/health"
+            "health": "/health",
+            "metrics": "/metrics"
         }
     }
 
 
+@router.get("/metrics")
+async def metrics():
+    """Browser pool usage and the active image backend for capacity tuning."""
+    return {"browser_pool": browser_pool.stats(), "image_backend": image_backend()}
+
+
 @router.get("/")
-async def root():
+async def root(request: Request):
     """Serve the frontend interface."""
+    index_page = request.app.state.index_page
+    if index_page:
+        return index_page.response(request)
     return FileResponse("static/index.html")
 
-
-@router.get("/{path:path}")
-async def serve_frontend(path: str, request: Request):
-    """Catch-all route to serve React frontend for client-side routing."""
-    # Check if it's an API route - don't serve frontend for these
-    if path.startswith(("api", "screenshot", "shorten", "s/", "cache", "health", "static")):
-        # Let other routers handle these
-        from fastapi import HTTPException
-        raise HTTPException(status_code=404, detail="Not found")
-    
-    # For all other routes, serve the React app
-    static_file = Path(f"static/{path}")
-    if static_file.exists() and static_file.is_file():
-        return FileResponse(static_file)
-    
-    # Default to index.html for React Router
-    return FileResponse("static/index.html")
@@ -1,9 +1,12 @@
+import logging
 from fastapi import APIRouter, HTTPException, Query, Request
 from ..config.settings import settings
 from ..models.link import ShortLinkRequest, ShortLinkResponse, ShortLinkInfo
 from ..services.link import link_service
 from ..utils.validation import URLValidator
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 
@@ -31,7 +34,7 @@ async def create_short_link(
         return await link_service.create_short_link(request)
         
     except Exception as e:
-        print(f"Error creating short link: {e}")
+        logger.exception("Error creating short link: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to create short link: {str(e)}")
 
 
@@ -42,7 +45,7 @@ async def resolve_short_link(short_id: str, request: Request):
     try:
         return await link_service.resolve_short_link(short_id, request)
     except Exception as e:
-        print(f"Error resolving short link: {e}")
+        logger.info("Error resolving short link %s: %s", short_id, e)
         raise HTTPException(status_code=404, detail="Short link not found")
 
 
@@ -53,5 +56,5 @@ async def get_short_link_info(short_id: str) -> ShortLinkInfo:
     try:
         return await link_service.get_short_link_info(short_id)
     except Exception as e:
-        print(f"Error getting short link info: {e}")
+        logger.info("Error getting short link info %s: %s", short_id, e)
         raise HTTPException(status_code=404, detail="Short link not found")
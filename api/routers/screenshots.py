@@ -1,19 +1,40 @@
-from fastapi import APIRouter, HTTPException, Query
-from fastapi.responses import Response, JSONResponse
-from datetime import datetime
+import logging
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import Response
 from ..config.settings import settings
-from ..models.video import ScreenshotRequest, ScreenshotResponse
 from ..services.screenshot import screenshot_service
-from ..services.metadata import metadata_service
 from ..services.storage import storage_service
 from ..utils.validation import URLValidator
 from ..utils.cache import CacheManager
+from ..utils.static import IMMUTABLE_CACHE_CONTROL
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
+def _image_etag(filename: str) -> str:
+    """Strong ETag for a screenshot - the cache key is already a content hash."""
+    return f'"{filename.removesuffix(".jpg")}"'
+
+
+def _image_headers(filename: str) -> dict:
+    """Build caching headers for a cached screenshot file."""
+    return {
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+        "ETag": _image_etag(filename),
+        "Content-Disposition": f"inline; filename={filename}"
+    }
+
+
+def _is_not_modified(request: Request, filename: str) -> bool:
+    """Check whether the client already holds this screenshot."""
+    return request.headers.get("if-none-match") == _image_etag(filename)
+
+
 @router.get("/screenshot")
 async def get_screenshot(
+    request: Request,
     url: str = Query(..., description="Video URL to capture screenshot from"),
     t: float = Query(0, description="Timestamp in seconds", ge=0),
     w: int = Query(1280, description="Screenshot width", ge=100, le=settings.MAX_WIDTH),
@@ -30,68 +51,25 @@ async def get_screenshot(
         cache_key = CacheManager.generate_cache_key(url, t, w, h)
         cache_filename = f"{cache_key}.jpg"
         
-        # Check if screenshot already exists
-        existing_screenshot = await storage_service.load_screenshot(cache_filename)
-        if existing_screenshot:
-            return Response(
-                content=existing_screenshot,
-                media_type="image/jpeg",
-                headers={
-                    "Cache-Control": f"public, max-age={settings.CACHE_EXPIRY}",
-                    "Content-Disposition": f"inline; filename={cache_filename}"
-                }
-            )
-        
-        # Extract metadata
-        metadata = await metadata_service.extract_video_metadata(url)
+        if _is_not_modified(request, cache_filename):
+            return Response(status_code=304, headers=_image_headers(cache_filename))
         
-        # Capture screenshot
-        screenshot_bytes = await screenshot_service.capture_video_screenshot(url, t, w, h)
-        if not screenshot_bytes:
+        # Serve from the disk cache or capture a new screenshot
+        processed_bytes = await screenshot_service.get_screenshot(url, t, w, h)
+        if not processed_bytes:
             raise HTTPException(status_code=500, detail="Failed to capture screenshot")
         
-        # Process screenshot
-        processed_bytes = await screenshot_service.process_screenshot(screenshot_bytes, w, h)
-        
-        # Save to cache
-        await storage_service.save_screenshot(cache_filename, processed_bytes)
-        
         return Response(
             content=processed_bytes,
             media_type="image/jpeg",
-            headers={
-                "Cache-Control": f"public, max-age={settings.CACHE_EXPIRY}",
-                "Content-Disposition": f"inline; filename={cache_filename}"
-            }
+            headers=_image_headers(cache_filename)
         )
         
     except Exception as e:
-        print(f"Error generating screenshot: {e}")
+        logger.exception("Error generating screenshot: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to generate screenshot: {str(e)}")
 
 
-@router.get("/cache/{cache_key}")
-async def serve_cached_image(cache_key: str):
-    """Serve a cached screenshot image."""
-    
-    # Add .jpg extension if not present
-    if not cache_key.endswith('.jpg'):
-        cache_key += '.jpg'
-    
-    screenshot_bytes = await storage_service.load_screenshot(cache_key)
-    if not screenshot_bytes:
-        raise HTTPException(status_code=404, detail="Image not found")
-    
-    return Response(
-        content=screenshot_bytes,
-        media_type="image/jpeg",
-        headers={
-            "Cache-Control": f"public, max-age={settings.CACHE_EXPIRY}",
-            "Content-Disposition": f"inline; filename={cache_key}"
-        }
-    )
-
-
 @router.delete("/cache/{cache_key}")
 async def clear_cache_item(cache_key: str):
     """Clear a specific cached screenshot."""
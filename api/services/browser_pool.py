@@ -0,0 +1,379 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page, Playwright
+from ..config.settings import settings
+from ..utils.blocklist import STATIC_ASSET_URL_RE, TRACKER_URL_RE
+
+logger = logging.getLogger(__name__)
+
+
+BROWSER_ARGS = [
+    '--no-sandbox',
+    '--disable-setuid-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-accelerated-2d-canvas',
+    '--no-first-run',
+    '--no-zygote',
+    '--disable-gpu',
+    '--disable-web-security',
+    '--disable-background-timer-throttling',
+    '--disable-backgrounding-occluded-windows',
+    '--disable-renderer-backgrounding',
+    '--autoplay-policy=no-user-gesture-required',
+    '--disable-extensions',
+    '--disable-plugins',
+    '--mute-audio',
+    '--disable-blink-features=AutomationControlled',
+    '--disable-ipc-flooding-protection',
+    '--force-device-scale-factor=1',
+    '--disable-features=VizDisplayCompositor,VizHitTestSurfaceLayer',
+    '--disable-field-trial-config',
+    '--no-default-browser-check',
+    '--disable-default-apps'
+]
+
+# Software-rendering flags dropped when BROWSER_GPU is enabled
+_SOFTWARE_RENDERING_ARGS = frozenset({
+    '--disable-gpu',
+    '--disable-accelerated-2d-canvas',
+    '--disable-features=VizDisplayCompositor,VizHitTestSurfaceLayer'
+})
+
+# Milliseconds allowed for resetting a released page to about:blank before the context is closed instead
+_RESET_TIMEOUT_MS = 2000
+
+GPU_BROWSER_ARGS = [
+    '--use-gl=angle',
+    '--ignore-gpu-blocklist',
+    '--enable-features=VaapiVideoDecoder,VaapiVideoEncoder'
+]
+
+
+def launch_options() -> Dict[str, Any]:
+    """
+    Keyword arguments for chromium.launch, honouring BROWSER_GPU.
+
+    With GPU enabled the full Chromium build is used: its new headless mode
+    keeps the GPU process for hardware video decode, the headless shell does not.
+
+    Returns:
+        Dict with headless, args and, for GPU hosts, the browser channel
+    """
+    if not settings.BROWSER_GPU:
+        return {'headless': True, 'args': BROWSER_ARGS}
+
+    args = [arg for arg in BROWSER_ARGS if arg not in _SOFTWARE_RENDERING_ARGS] + GPU_BROWSER_ARGS
+    return {'headless': True, 'channel': 'chromium', 'args': args}
+
+
+def origin_of(url: str) -> str:
+    """Scheme and host of a URL, used to key warm context pools."""
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc.lower()}"
+
+
+async def _abort_request(route) -> None:
+    """Route handler dropping a request without a response."""
+    await route.abort()
+
+
+async def block_trackers(context: BrowserContext) -> None:
+    """
+    Abort requests to ad, analytics and consent-manager hosts in a context.
+
+    The pattern is matched by the Playwright driver, so regular page
+    traffic is never routed through Python.
+
+    Args:
+        context: Context to install the route on
+    """
+    await context.route(TRACKER_URL_RE, _abort_request)
+
+
+async def block_static_assets(context: BrowserContext) -> None:
+    """
+    Abort image and web-font requests in a context.
+
+    Like block_trackers, the pattern is matched by the Playwright driver.
+    Stylesheets are left alone - players lay out the video element with them.
+
+    Args:
+        context: Context to install the route on
+    """
+    await context.route(STATIC_ASSET_URL_RE, _abort_request)
+
+
+async def open_page(context: BrowserContext) -> Page:
+    """
+    Get the blank page kept open in a warm context, or open a new one.
+
+    Args:
+        context: Context from BrowserPool.context
+
+    Returns:
+        Page: A page ready to navigate
+    """
+    pages = context.pages
+    return pages[0] if pages else await context.new_page()
+
+
+class BrowserPool:
+    """Shared headless Chromium handing out a fresh BrowserContext per request."""
+
+    def __init__(self):
+        self._playwright: Optional[Playwright] = None
+        self._browser: Optional[Browser] = None
+        self._remote = False
+        self._lock = asyncio.Lock()
+        self._contexts_served = 0
+        self._launched_at = 0.0
+        self._in_flight: Dict[Browser, int] = {}
+        # Warm contexts per reuse key, least recently released key first
+        self._idle: OrderedDict[str, List[Tuple[Browser, BrowserContext, int]]] = OrderedDict()
+        self._context_slots = asyncio.Semaphore(settings.MAX_CONCURRENT_CONTEXTS)
+        self._waiting = 0
+        self.recycles = 0
+
+    async def get_browser(self) -> Browser:
+        """
+        Get the shared browser, launching or recycling it when needed.
+
+        The browser is replaced after BROWSER_RECYCLE_AFTER contexts or
+        BROWSER_MAX_AGE seconds to keep Chromium's native memory from
+        drifting; the old one is closed once its last context is released. A browser shared over CDP is only
+        replaced when the connection drops.
+
+        Returns:
+            Browser: The current shared browser
+        """
+        async with self._lock:
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+
+            browser = self._browser
+            if browser is not None and browser.is_connected() and (
+                self._remote or not self._is_worn_out()
+            ):
+                return browser
+
+            if browser is not None:
+                self._browser = None
+                self.recycles += 1
+                if not self._in_flight.get(browser):
+                    await self._close_browser(browser)
+
+            self._browser = await self._start_browser()
+            self._contexts_served = 0
+            self._launched_at = time.monotonic()
+            return self._browser
+
+    def _is_worn_out(self) -> bool:
+        """Whether the current browser has served enough contexts or lived long enough to be replaced."""
+        return (
+            self._contexts_served >= settings.BROWSER_RECYCLE_AFTER
+            or time.monotonic() - self._launched_at >= settings.BROWSER_MAX_AGE
+        )
+
+    async def _start_browser(self) -> Browser:
+        """Connect to the shared Chromium when configured, otherwise launch a local one."""
+        self._remote = False
+        if settings.BROWSER_CDP_ENDPOINT:
+            try:
+                browser = await self._playwright.chromium.connect_over_cdp(settings.BROWSER_CDP_ENDPOINT)
+                self._remote = True
+                return browser
+            except Exception as e:
+                logger.warning("Shared browser at %s unreachable, launching locally: %s",
+                               settings.BROWSER_CDP_ENDPOINT, e)
+
+        return await self._playwright.chromium.launch(**launch_options())
+
+    @asynccontextmanager
+    async def context(
+        self,
+        reuse_key: Optional[str] = None,
+        setup: Optional[Callable[[BrowserContext], Awaitable[None]]] = None,
+        **options
+    ) -> AsyncIterator[BrowserContext]:
+        """
+        Get a BrowserContext on the shared browser for the duration of a request.
+
+        At most MAX_CONCURRENT_CONTEXTS contexts are in use at once; further
+        callers wait for a free slot. Contexts acquired with a reuse_key are
+        kept warm afterwards - cookies cleared, one blank page left open - and handed
+        to the next caller with the same key, up to CONTEXT_REUSE_LIMIT uses.
+
+        Args:
+            reuse_key: Key of the warm pool to draw from, usually profile and origin
+            setup: Coroutine run once on each newly created context (routes, init scripts)
+            **options: Keyword arguments for Browser.new_context
+
+        Yields:
+            BrowserContext: An isolated context
+        """
+        self._waiting += 1
+        try:
+            await self._context_slots.acquire()
+        finally:
+            self._waiting -= 1
+
+        try:
+            async with self._open_context(reuse_key, setup, options) as context:
+                yield context
+        finally:
+            self._context_slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get pool usage counters.
+
+        Returns:
+            Dict with in-flight contexts, waiters, warm contexts, recycles and the concurrency limit
+        """
+        return {
+            "in_flight": sum(self._in_flight.values()),
+            "waiting": self._waiting,
+            "warm": sum(len(idle) for idle in self._idle.values()),
+            "max_concurrent": settings.MAX_CONCURRENT_CONTEXTS,
+            "contexts_served": self._contexts_served,
+            "recycles": self.recycles
+        }
+
+    @asynccontextmanager
+    async def _open_context(
+        self,
+        reuse_key: Optional[str],
+        setup: Optional[Callable[[BrowserContext], Awaitable[None]]],
+        options: Dict[str, Any]
+    ) -> AsyncIterator[BrowserContext]:
+        """Take a warm context or open a new one, and track it for recycling."""
+        browser = await self.get_browser()
+        self._contexts_served += 1
+        self._in_flight[browser] = self._in_flight.get(browser, 0) + 1
+
+        context, uses = self._take_idle(reuse_key, browser)
+        try:
+            if context is None:
+                context = await browser.new_context(**options)
+                if setup:
+                    try:
+                        await setup(context)
+                    except Exception:
+                        # A half-configured context must never be handed out again
+                        await context.close()
+                        context = None
+                        raise
+            yield context
+        finally:
+            if context is not None:
+                await self._release_context(reuse_key, browser, context, uses + 1)
+
+            # close() may already have dropped (and closed) the browser mid-capture
+            if browser in self._in_flight:
+                self._in_flight[browser] -= 1
+                if browser is not self._browser and not self._in_flight[browser]:
+                    await self._close_browser(browser)
+
+    def _take_idle(self, reuse_key: Optional[str], browser: Browser) -> Tuple[Optional[BrowserContext], int]:
+        """Pop a warm context for the key that belongs to the current browser."""
+        idle = self._idle.get(reuse_key) if reuse_key else None
+        while idle:
+            owner, context, uses = idle.pop()
+            if owner is browser:
+                return context, uses
+        return None, 0
+
+    async def _release_context(self, reuse_key: Optional[str], browser: Browser, context: BrowserContext, uses: int) -> None:
+        """Reset a context and keep it warm, or close it if it cannot be reused."""
+        idle = self._idle.setdefault(reuse_key, []) if reuse_key else None
+        reusable = (
+            idle is not None
+            and browser is self._browser
+            and uses < settings.CONTEXT_REUSE_LIMIT
+            and len(idle) < settings.MAX_WARM_CONTEXTS_PER_KEY
+        )
+
+        if reusable:
+            try:
+                # Keep one blank page open so the next user skips creating a target
+                pages = context.pages
+                for page in pages[1:]:
+                    await page.close()
+                if pages:
+                    # A page stuck after a capture timeout must not hold its slot for Playwright's default 30 s
+                    await pages[0].goto('about:blank', timeout=_RESET_TIMEOUT_MS)
+                await context.clear_cookies()
+            except Exception:
+                reusable = False  # A context that cannot be reset is never handed out again
+
+        if reusable:
+            idle.append((browser, context, uses))
+            self._idle.move_to_end(reuse_key)
+            await self._evict_idle()
+            return
+
+        try:
+            await context.close()
+        except Exception:
+            pass
+
+    async def _evict_idle(self) -> None:
+        """Close warm contexts of the least recently used keys beyond MAX_WARM_CONTEXTS."""
+        excess = sum(len(idle) for idle in self._idle.values()) - settings.MAX_WARM_CONTEXTS
+        while excess > 0 and self._idle:
+            key, idle = next(iter(self._idle.items()))
+            if not idle:
+                del self._idle[key]
+                continue
+            _, context, _ = idle.pop(0)
+            if not idle:
+                del self._idle[key]
+            excess -= 1
+            try:
+                await context.close()
+            except Exception:
+                pass
+
+    async def warm_up(self) -> None:
+        """
+        Launch the browser and open one throwaway context at startup.
+
+        Pays the Chromium launch and first-context cost before the first
+        request instead of during it. Failures are logged, not raised, so
+        the API still starts when the browser is unavailable.
+        """
+        try:
+            async with self.context():
+                pass
+        except Exception as e:
+            logger.warning("Browser warm-up failed: %s", e)
+
+    async def close(self) -> None:
+        """Close the shared browser and stop the Playwright driver."""
+        async with self._lock:
+            self._idle.clear()
+            if self._browser is not None:
+                await self._close_browser(self._browser)
+                self._browser = None
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+
+    async def _close_browser(self, browser: Browser) -> None:
+        """Close a browser that no longer serves new contexts."""
+        self._in_flight.pop(browser, None)
+        for key, idle in self._idle.items():
+            self._idle[key] = [entry for entry in idle if entry[0] is not browser]
+        try:
+            await browser.close()
+        except Exception:
+            pass
+
+
+# Global browser pool instance
+browser_pool = BrowserPool()
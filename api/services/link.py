@@ -1,4 +1,8 @@
-from typing import Optional
+import asyncio
+import logging
+import string
+from collections import Counter
+from typing import Any, Callable, Dict, Optional
 from datetime import datetime
 from fastapi import Request
 from fastapi.responses import HTMLResponse, RedirectResponse
@@ -11,10 +15,128 @@ from ..services.storage import storage_service
 from ..services.metadata import metadata_service
 from ..services.screenshot import screenshot_service
 
+logger = logging.getLogger(__name__)
+
+
+# OpenGraph preview page served to crawlers, compiled once at import
+_OG_TEMPLATE = string.Template("""
+<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>$title</title>
+    <meta name="description" content="$description">
+    
+    <!-- OpenGraph tags -->
+    <meta property="og:title" content="$title">
+    <meta property="og:description" content="$description">
+    <meta property="og:image" content="$screenshot_url">
+    <meta property="og:image:secure_url" content="$screenshot_url">
+    <meta property="og:image:type" content="image/jpeg">
+    <meta property="og:image:width" content="$width">
+    <meta property="og:image:height" content="$height">
+    <meta property="og:image:alt" content="Video screenshot at $timestamp_display">
+    <meta property="og:url" content="$short_url">
+    <meta property="og:type" content="article">
+    <meta property="og:site_name" content="t1me.it">
+    <meta property="article:author" content="t1me.it">
+    <meta property="article:published_time" content="$published_time">
+    
+    <!-- Additional meta tags to override YouTube -->
+    <meta name="robots" content="index, follow">
+    <meta name="thumbnail" content="$screenshot_url">
+    <link rel="image_src" href="$screenshot_url">
+    
+    <!-- Twitter Card tags -->
+    <meta name="twitter:card" content="summary_large_image">
+    <meta name="twitter:title" content="$title">
+    <meta name="twitter:description" content="$description">
+    <meta name="twitter:image" content="$screenshot_url">
+    
+    <!-- Auto-redirect disabled for bots to prevent OpenGraph conflicts -->
+    
+    <style>
+        body {
+            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
+            max-width: 600px;
+            margin: 50px auto;
+            padding: 20px;
+            text-align: center;
+        }
+        .preview {
+            border: 1px solid #ddd;
+            border-radius: 8px;
+            padding: 20px;
+            margin: 20px 0;
+        }
+        .screenshot {
+            max-width: 100%;
+            border-radius: 4px;
+            margin: 10px 0;
+        }
+        .redirect-link {
+            color: #1a73e8;
+            text-decoration: none;
+            font-weight: 500;
+        }
+    </style>
+</head>
+<body>
+    <h1>t1me.it</h1>
+    <div class="preview">
+        <h2>$title</h2>
+        <img src="$screenshot_url" alt="Video screenshot" class="screenshot">
+        <p>$description</p>
+        <p>
+            <a href="$original_url" class="redirect-link">
+                Continue to $site_name →
+            </a>
+        </p>
+    </div>
+    <p><small>Powered by t1me.it - Precise video screenshots, delivered instantly</small></p>
+</body>
+</html>
+""")
+
+
+def _query_timestamp(url: str, timestamp: float) -> str:
+    """Append a ?t= / &t= start time (YouTube)."""
+    separator = "&" if "?" in url else "?"
+    return f"{url}{separator}t={int(timestamp)}s"
+
+
+def _fragment_timestamp(url: str, timestamp: float) -> str:
+    """Append a #t= start time (Vimeo)."""
+    return f"{url}#t={int(timestamp)}s"
+
+
+# Start-time URL formatters by domain for platforms that support deep links;
+# subdomains (m., music., player. ...) use their parent domain's formatter
+_TIMESTAMP_FORMATTERS = {
+    "youtube.com": _query_timestamp,
+    "youtube-nocookie.com": _query_timestamp,
+    "youtu.be": _query_timestamp,
+    "vimeo.com": _fragment_timestamp,
+}
+
+
+def _timestamp_formatter(host: str) -> Optional[Callable[[str, float], str]]:
+    """Find the start-time formatter for a host or its nearest listed parent domain."""
+    labels = host.split(".")
+    for i in range(len(labels) - 1):
+        formatter = _TIMESTAMP_FORMATTERS.get(".".join(labels[i:]))
+        if formatter:
+            return formatter
+    return None
+
 
 class LinkService:
     """Service for managing short links and OpenGraph previews."""
     
+    def __init__(self):
+        # Clicks are counted in-process and written to storage in batches
+        self._pending_clicks: Counter = Counter()
+    
     async def create_short_link(self, request: ShortLinkRequest) -> ShortLinkResponse:
         """
         Create a short link for a video URL with timestamp and custom screenshot.
@@ -27,22 +149,17 @@ class LinkService:
         """
         url_str = str(request.url)
         
-        # Extract video metadata
-        metadata = await metadata_service.extract_video_metadata(url_str)
-        
-        # Generate screenshot for the thumbnail
-        screenshot_bytes = await screenshot_service.capture_video_screenshot(
-            url_str, request.timestamp, request.width, request.height
+        # Extract video metadata and load or capture the thumbnail concurrently
+        metadata, processed_bytes = await asyncio.gather(
+            metadata_service.extract_video_metadata(url_str),
+            screenshot_service.get_screenshot(
+                url_str, request.timestamp, request.width, request.height
+            )
         )
         
-        if not screenshot_bytes:
+        if not processed_bytes:
             raise Exception("Failed to capture screenshot")
         
-        # Process screenshot
-        processed_bytes = await screenshot_service.process_screenshot(
-            screenshot_bytes, request.width, request.height
-        )
-        
         # Generate short ID
         short_id = CacheManager.generate_short_id()
         
@@ -64,16 +181,16 @@ class LinkService:
         )
         
         # Save short link
-        await storage_service.save_short_link(short_id, link_data.dict())
+        await storage_service.save_short_link(short_id, link_data.model_dump(mode="json"))
         
         # Return short link info
-        short_url = f"{settings.BASE_URL}/s/{short_id}"
+        short_url = settings.SHORT_URL_PREFIX + short_id
         return ShortLinkResponse(
             short_id=short_id,
             short_url=short_url,
             original_url=url_str,
             timestamp=request.timestamp,
-            screenshot_url=f"{settings.BASE_URL}{link_data.screenshot_url}",
+            screenshot_url=settings.BASE_URL + link_data.screenshot_url,
             metadata=metadata
         )
     
@@ -88,35 +205,30 @@ class LinkService:
         Returns:
             HTMLResponse or RedirectResponse
         """
-        # Load short link data
-        link_data_dict = await storage_service.load_short_link(short_id)
-        if not link_data_dict:
-            raise Exception("Short link not found")
-        
-        # Convert to model
-        link_data = ShortLinkData(**link_data_dict)
-        
-        # Increment click counter
-        link_data.clicks += 1
-        await storage_service.save_short_link(short_id, link_data.dict())
-        
         # Check if request is from a bot/crawler (for OpenGraph) or preview is forced
         user_agent = request.headers.get("user-agent", "")
         force_preview = request.query_params.get("preview") == "1"
         
-        # Debug: Print the user agent
-        print(f"Short link access - User-Agent: {user_agent}")
-        
         is_bot = force_preview or CacheManager.is_bot_user_agent(user_agent)
         
-        print(f"Bot detection result: {is_bot} (force_preview: {force_preview})")
+        logger.debug("Short link %s - User-Agent: %s, bot: %s (force_preview: %s)",
+                     short_id, user_agent, is_bot, force_preview)
         
         if is_bot:
             # Serve OpenGraph HTML for social media previews
-            return await self._serve_opengraph_preview(link_data, request)
+            response = await self._serve_opengraph_preview(short_id)
         else:
-            # Redirect to original URL with timestamp
-            return self._redirect_to_original(link_data)
+            # Redirect to original URL with timestamp - stored data is trusted,
+            # so it is used as-is without building a model
+            link_data = await storage_service.load_short_link(short_id)
+            if not link_data:
+                raise Exception("Short link not found")
+            response = self._redirect_to_original(link_data)
+        
+        # Count the click; it is persisted by the periodic flush
+        self._pending_clicks[short_id] += 1
+        
+        return response
     
     async def get_short_link_info(self, short_id: str) -> ShortLinkInfo:
         """
@@ -136,28 +248,57 @@ class LinkService:
         
         return ShortLinkInfo(
             short_id=short_id,
-            short_url=f"{settings.BASE_URL}/s/{short_id}",
+            short_url=settings.SHORT_URL_PREFIX + short_id,
             original_url=link_data.original_url,
             timestamp=link_data.timestamp,
-            screenshot_url=f"{settings.BASE_URL}{link_data.screenshot_url}",
+            screenshot_url=settings.BASE_URL + link_data.screenshot_url,
             metadata=link_data.metadata,
             created_at=link_data.created_at,
             clicks=link_data.clicks
         )
     
-    async def _serve_opengraph_preview(self, link_data: ShortLinkData, request: Request) -> HTMLResponse:
+    async def flush_clicks(self) -> None:
+        """Write clicks accumulated since the last flush to storage, keeping unwritten ones for the next flush."""
+        if not self._pending_clicks:
+            return
+        
+        pending, self._pending_clicks = self._pending_clicks, Counter()
+        try:
+            await storage_service.increment_clicks(pending)
+        except Exception:
+            # Whatever was not written is counted again on the next tick
+            self._pending_clicks.update(pending)
+            raise
+    
+    async def run_click_flusher(self) -> None:
+        """Flush accumulated clicks every CLICK_FLUSH_INTERVAL seconds until cancelled."""
+        while True:
+            await asyncio.sleep(settings.CLICK_FLUSH_INTERVAL)
+            try:
+                await self.flush_clicks()
+            except Exception as e:
+                logger.warning("Failed to flush click counts: %s", e)
+    
+    async def _serve_opengraph_preview(self, short_id: str) -> HTMLResponse:
         """Serve OpenGraph HTML preview with custom screenshot."""
+        # Link data never changes, so the rendered page is cached per link
+        cache_key = f"og:{short_id}"
+        cached_html = await storage_service.get_cached(cache_key)
+        if cached_html:
+            return HTMLResponse(content=cached_html)
+        
+        link_data_dict = await storage_service.load_short_link(short_id)
+        if not link_data_dict:
+            raise Exception("Short link not found")
+        
+        link_data = ShortLinkData(**link_data_dict)
         metadata = link_data.metadata
         
-        # Add cache-busting parameter to force Facebook to refresh
-        import time
-        cache_buster = int(time.time())
-        screenshot_url = f"{settings.BASE_URL}{link_data.screenshot_url}?v={cache_buster}"
-        short_url = f"{settings.BASE_URL}/s/{link_data.short_id}"
+        # No cache-buster: screenshot URLs are immutable, so crawlers and CDNs may cache them
+        screenshot_url = settings.BASE_URL + link_data.screenshot_url
+        short_url = settings.SHORT_URL_PREFIX + link_data.short_id
         
-        # Debug: Print the screenshot URL being used
-        print(f"OpenGraph preview - screenshot_url: {screenshot_url}")
-        print(f"DEBUG: og:image tag will be: <meta property='og:image' content='{screenshot_url}'>")
+        logger.debug("OpenGraph preview - screenshot_url: %s", screenshot_url)
         
         # Build timestamp display
         timestamp = link_data.timestamp
@@ -173,99 +314,32 @@ class LinkService:
         title = f"{metadata.title}{timestamp_display}"
         description = metadata.description or f"Watch this video{timestamp_display}"
         
-        html_content = f"""
-<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="utf-8">
-    <title>{title}</title>
-    <meta name="description" content="{description}">
-    
-    <!-- OpenGraph tags -->
-    <meta property="og:title" content="{title}">
-    <meta property="og:description" content="{description}">
-    <meta property="og:image" content="{screenshot_url}">
-    <meta property="og:image:secure_url" content="{screenshot_url}">
-    <meta property="og:image:type" content="image/jpeg">
-    <meta property="og:image:width" content="{link_data.width}">
-    <meta property="og:image:height" content="{link_data.height}">
-    <meta property="og:image:alt" content="Video screenshot at {timestamp_display}">
-    <meta property="og:url" content="{short_url}">
-    <meta property="og:type" content="article">
-    <meta property="og:site_name" content="t1me.it">
-    <meta property="article:author" content="t1me.it">
-    <meta property="article:published_time" content="{link_data.created_at.isoformat()}">
-    
-    <!-- Additional meta tags to override YouTube -->
-    <meta name="robots" content="index, follow">
-    <meta name="thumbnail" content="{screenshot_url}">
-    <link rel="image_src" href="{screenshot_url}">
-    
-    <!-- Twitter Card tags -->
-    <meta name="twitter:card" content="summary_large_image">
-    <meta name="twitter:title" content="{title}">
-    <meta name="twitter:description" content="{description}">
-    <meta name="twitter:image" content="{screenshot_url}">
-    
-    <!-- Auto-redirect disabled for bots to prevent OpenGraph conflicts -->
-    
-    <style>
-        body {{
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-            max-width: 600px;
-            margin: 50px auto;
-            padding: 20px;
-            text-align: center;
-        }}
-        .preview {{
-            border: 1px solid #ddd;
-            border-radius: 8px;
-            padding: 20px;
-            margin: 20px 0;
-        }}
-        .screenshot {{
-            max-width: 100%;
-            border-radius: 4px;
-            margin: 10px 0;
-        }}
-        .redirect-link {{
-            color: #1a73e8;
-            text-decoration: none;
-            font-weight: 500;
-        }}
-    </style>
-</head>
-<body>
-    <h1>t1me.it</h1>
-    <div class="preview">
-        <h2>{title}</h2>
-        <img src="{screenshot_url}" alt="Video screenshot" class="screenshot">
-        <p>{description}</p>
-        <p>
-            <a href="{link_data.original_url}" class="redirect-link">
-                Continue to {metadata.site_name} →
-            </a>
-        </p>
-    </div>
-    <p><small>Powered by t1me.it - Precise video screenshots, delivered instantly</small></p>
-</body>
-</html>
-        """
+        html_content = _OG_TEMPLATE.substitute(
+            title=title,
+            description=description,
+            screenshot_url=screenshot_url,
+            width=link_data.width,
+            height=link_data.height,
+            timestamp_display=timestamp_display,
+            short_url=short_url,
+            published_time=link_data.created_at.isoformat(),
+            original_url=link_data.original_url,
+            site_name=metadata.site_name
+        )
+        await storage_service.set_cached(cache_key, html_content, settings.CACHE_EXPIRY)
         
         return HTMLResponse(content=html_content)
     
-    def _redirect_to_original(self, link_data: ShortLinkData) -> RedirectResponse:
+    def _redirect_to_original(self, link_data: Dict[str, Any]) -> RedirectResponse:
         """Redirect to original URL with timestamp."""
-        original_url = link_data.original_url
-        timestamp = link_data.timestamp
+        original_url = link_data["original_url"]
+        timestamp = link_data.get("timestamp", 0)
         
         # Add timestamp to URL if it's a supported platform
         if timestamp > 0:
-            if "youtube.com" in original_url or "youtu.be" in original_url:
-                separator = "&" if "?" in original_url else "?"
-                original_url += f"{separator}t={int(timestamp)}s"
-            elif "vimeo.com" in original_url:
-                original_url += f"#t={int(timestamp)}s"
+            add_timestamp = _timestamp_formatter(urlparse(original_url).hostname or "")
+            if add_timestamp:
+                original_url = add_timestamp(original_url, timestamp)
         
         return RedirectResponse(url=original_url, status_code=302)
 
@@ -1,16 +1,172 @@
-from typing import Dict, Any
+import asyncio
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
 from urllib.parse import urlparse
-from playwright.async_api import async_playwright
+import httpx
+from bs4 import BeautifulSoup
 from ..config.settings import settings
 from ..models.video import VideoMetadata
+from ..services.browser_pool import block_trackers, browser_pool, open_page, origin_of
+from ..services.storage import storage_service
+from ..utils.validation import URLValidator
+
+
+# Collects every field read from the page; durations keeps all candidates in priority order
+_META_TAGS_SCRIPT = """() => {
+    const attr = (selector, name = 'content') =>
+        document.querySelector(selector)?.getAttribute(name) || '';
+    return {
+        title: document.title,
+        description: attr('meta[name="description"]') ||
+            attr('meta[property="og:description"]') ||
+            attr('meta[name="twitter:description"]'),
+        site_name: attr('meta[property="og:site_name"]'),
+        durations: [
+            attr('meta[property="video:duration"]'),
+            attr('meta[name="duration"]'),
+            attr('[itemprop="duration"]')
+        ].filter(Boolean),
+        thumbnail: attr('meta[property="og:image"]') || attr('meta[name="twitter:image"]')
+    };
+}"""
+
+# Time part of an ISO 8601 duration (after "PT"), e.g. 1H2M3.5S
+_ISO_DURATION_RE = re.compile(r'(?:(\d+)H)?(?:(\d+)M)?(?:(\d+(?:\.\d+)?)S)?')
+
+# Extracted text is cut to these lengths before it reaches previews and storage
+_MAX_TITLE_LENGTH = 300
+_MAX_DESCRIPTION_LENGTH = 2000
+
+# Platforms that describe a video in one JSON call, no page load needed
+_OEMBED_ENDPOINTS = {
+    'youtube.com': 'https://www.youtube.com/oembed',
+    'm.youtube.com': 'https://www.youtube.com/oembed',
+    'youtu.be': 'https://www.youtube.com/oembed',
+    'vimeo.com': 'https://vimeo.com/api/oembed.json',
+    'player.vimeo.com': 'https://vimeo.com/api/oembed.json'
+}
+
+# Resource types that never carry meta tags
+_BLOCKED_RESOURCE_TYPES = frozenset({'image', 'font', 'stylesheet', 'media'})
+
+
+async def _block_heavy_resources(route) -> None:
+    """Abort requests the metadata page does not need."""
+    if route.request.resource_type in _BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+async def _setup_metadata_context(context) -> None:
+    """Prepare a new metadata context before its first use."""
+    await context.route('**/*', _block_heavy_resources)
+    await block_trackers(context)
+
+
+def _read_meta_tags(html: str) -> Dict[str, Any]:
+    """Read the same fields as _META_TAGS_SCRIPT from server-rendered HTML."""
+    # Meta tags live in the head - skip parsing the (often huge) body
+    head_end = html.find('</head>')
+    soup = BeautifulSoup(html[:head_end] if head_end != -1 else html, 'html.parser')
+    
+    def attr(selector: str, name: str = 'content') -> str:
+        element = soup.select_one(selector)
+        return (element.get(name) or '') if element else ''
+    
+    return {
+        "title": soup.title.get_text(strip=True) if soup.title else attr('meta[property="og:title"]'),
+        "description": attr('meta[name="description"]') or
+            attr('meta[property="og:description"]') or
+            attr('meta[name="twitter:description"]'),
+        "site_name": attr('meta[property="og:site_name"]'),
+        "durations": [value for value in (
+            attr('meta[property="video:duration"]'),
+            attr('meta[name="duration"]'),
+            attr('[itemprop="duration"]')
+        ) if value],
+        "thumbnail": attr('meta[property="og:image"]') or attr('meta[name="twitter:image"]')
+    }
+
+
+def _metadata_from_tags(tags: Dict[str, Any], host: str) -> VideoMetadata:
+    """Build metadata from the fields read out of a page's head."""
+    # Every field is already a cleaned string - skip pydantic validation
+    return VideoMetadata.model_construct(
+        title=_clean_text(tags["title"], _MAX_TITLE_LENGTH) or "Video",
+        description=_clean_text(tags["description"], _MAX_DESCRIPTION_LENGTH),
+        site_name=_clean_text(tags["site_name"], _MAX_TITLE_LENGTH) or host,
+        duration=_parse_duration(tags["durations"]),
+        thumbnail_url=_clean_url(tags["thumbnail"])
+    )
+
+
+def _metadata_from_oembed(data: Dict[str, Any], host: str) -> Optional[VideoMetadata]:
+    """Build metadata from an oEmbed response."""
+    title = _clean_text(data.get("title"), _MAX_TITLE_LENGTH)
+    if not title:
+        return None
+    
+    duration = data.get("duration")
+    return VideoMetadata.model_construct(
+        title=title,
+        description=_clean_text(data.get("description"), _MAX_DESCRIPTION_LENGTH),
+        site_name=_clean_text(data.get("provider_name"), _MAX_TITLE_LENGTH) or host,
+        duration=float(duration) if isinstance(duration, (int, float)) else None,
+        thumbnail_url=_clean_url(data.get("thumbnail_url"))
+    )
+
+
+def _clean_text(value: Any, limit: int) -> str:
+    """Coerce an extracted value to a stripped string of bounded length."""
+    return value.strip()[:limit] if isinstance(value, str) else ""
+
+
+def _clean_url(value: Any) -> Optional[str]:
+    """Keep only absolute http(s) URLs."""
+    if isinstance(value, str) and value.startswith(('http://', 'https://')):
+        return value
+    return None
+
+
+def _parse_duration(values: List[str]) -> Optional[float]:
+    """Parse the first usable duration, in seconds or ISO 8601 format."""
+    for content in values:
+        try:
+            return float(content)
+        except ValueError:
+            # Handle ISO 8601 duration format (PT1M30S)
+            if content.startswith('PT'):
+                return _parse_iso_duration(content)
+    
+    return None
+
+
+def _parse_iso_duration(duration_str: str) -> float:
+    """Parse ISO 8601 duration format (PT1M30S) to seconds."""
+    # Skip the PT prefix and read hours, minutes and seconds in one pass
+    match = _ISO_DURATION_RE.match(duration_str, 2)
+    hours, minutes, seconds = match.groups(default='0')
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
 
 
 class MetadataService:
     """Service for extracting video metadata from web pages."""
     
+    def __init__(self):
+        # Canonical URL -> (expiry time, metadata), least recently used first
+        self._cache: OrderedDict[str, Tuple[float, VideoMetadata]] = OrderedDict()
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._http_client: Optional[httpx.AsyncClient] = None
+    
     async def extract_video_metadata(self, url: str) -> VideoMetadata:
         """
-        Extract video metadata using headless browser.
+        Extract video metadata, served from memory or Redis when recently extracted.
+        
+        Concurrent requests for the same canonical URL share one extraction.
         
         Args:
             url: The video URL to extract metadata from
@@ -18,186 +174,152 @@ class MetadataService:
         Returns:
             VideoMetadata: Extracted metadata
         """
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(
-                headless=True,
-                args=[
-                    '--no-sandbox',
-                    '--disable-setuid-sandbox',
-                    '--disable-dev-shm-usage',
-                    '--disable-accelerated-2d-canvas',
-                    '--no-first-run',
-                    '--no-zygote',
-                    '--disable-gpu'
-                ]
-            )
-            
-            try:
-                context = await browser.new_context(
-                    user_agent=settings.USER_AGENT
-                )
-                
-                page = await context.new_page()
-                await page.goto(url, wait_until='networkidle', timeout=settings.BROWSER_TIMEOUT)
-                
-                # Extract metadata from the page
-                title = await page.title() or "Video"
-                
-                # Try to get description from meta tags
-                description = await self._extract_description(page)
-                
-                # Get site name
-                site_name = await self._extract_site_name(page, url)
-                
-                # Try to get video duration (if available)
-                duration = await self._extract_duration(page)
-                
-                # Try to get thumbnail URL
-                thumbnail_url = await self._extract_thumbnail(page)
-                
-                return VideoMetadata(
-                    title=title,
-                    description=description,
-                    site_name=site_name,
-                    duration=duration,
-                    thumbnail_url=thumbnail_url
-                )
+        key = URLValidator.canonicalize_url(url)
+        metadata = self._get_from_memory(key)
+        if metadata:
+            return metadata
+        
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        try:
+            async with lock:
+                # Another request may have filled the cache while we waited
+                metadata = self._get_from_memory(key)
+                if metadata:
+                    return metadata
                 
-            finally:
-                await browser.close()
+                metadata = await self._extract_cached(key, url)
+                self._store_in_memory(key, metadata)
+                return metadata
+        finally:
+            if not lock.locked() and self._locks.get(key) is lock:
+                del self._locks[key]
     
-    async def _extract_description(self, page) -> str:
-        """Extract description from meta tags."""
-        description = ""
-        try:
-            # Try standard description meta tag
-            description_element = await page.query_selector('meta[name="description"]')
-            if description_element:
-                description = await description_element.get_attribute('content') or ""
-            
-            # Try og:description if no description found
-            if not description:
-                og_desc_element = await page.query_selector('meta[property="og:description"]')
-                if og_desc_element:
-                    description = await og_desc_element.get_attribute('content') or ""
-            
-            # Try twitter:description as fallback
-            if not description:
-                twitter_desc_element = await page.query_selector('meta[name="twitter:description"]')
-                if twitter_desc_element:
-                    description = await twitter_desc_element.get_attribute('content') or ""
-                    
-        except Exception:
-            pass
+    def _get_from_memory(self, key: str) -> Optional[VideoMetadata]:
+        """Get fresh metadata from the in-process cache."""
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
         
-        return description
+        expires_at, metadata = entry
+        if expires_at < time.monotonic():
+            del self._cache[key]
+            return None
+        
+        self._cache.move_to_end(key)
+        return metadata
     
-    async def _extract_site_name(self, page, url: str) -> str:
-        """Extract site name from meta tags or URL."""
-        site_name = ""
-        try:
-            # Try og:site_name
-            site_element = await page.query_selector('meta[property="og:site_name"]')
-            if site_element:
-                site_name = await site_element.get_attribute('content') or ""
-            
-            # Fallback to domain name
-            if not site_name:
-                parsed = urlparse(url)
-                site_name = parsed.netloc
-                if site_name.startswith('www.'):
-                    site_name = site_name[4:]
-                    
-        except Exception:
-            # Final fallback to domain from URL
+    def _store_in_memory(self, key: str, metadata: VideoMetadata) -> None:
+        """Add metadata to the in-process cache, evicting the least recently used."""
+        self._cache[key] = (time.monotonic() + settings.METADATA_MEMORY_CACHE_TTL, metadata)
+        self._cache.move_to_end(key)
+        while len(self._cache) > settings.METADATA_MEMORY_CACHE_SIZE:
+            self._cache.popitem(last=False)
+    
+    async def _extract_cached(self, key: str, url: str) -> VideoMetadata:
+        """Extract metadata through the shared Redis cache."""
+        cache_key = f"meta:{hashlib.sha1(key.encode()).hexdigest()}"
+        
+        cached = await storage_service.get_cached(cache_key)
+        if cached:
             try:
-                parsed = urlparse(url)
-                site_name = parsed.netloc
-            except Exception:
-                site_name = "Unknown"
+                return VideoMetadata.model_validate_json(cached)
+            except ValueError:
+                pass  # Stale or corrupt entry - extract again
         
-        return site_name
+        # Parsed once - doubles as the site name fallback and the oEmbed lookup key
+        host = urlparse(url).netloc.lower().removeprefix('www.') or "Unknown"
+        metadata = await self._extract_over_http(url, host) or await self._extract_from_page(url, host)
+        await storage_service.set_cached(
+            cache_key, metadata.model_dump_json(), settings.METADATA_CACHE_EXPIRY
+        )
+        return metadata
     
-    async def _extract_duration(self, page) -> float:
-        """Extract video duration if available."""
-        try:
-            # Try to find duration in various formats
-            duration_selectors = [
-                'meta[property="video:duration"]',
-                'meta[name="duration"]',
-                '[itemprop="duration"]'
-            ]
-            
-            for selector in duration_selectors:
-                element = await page.query_selector(selector)
-                if element:
-                    content = await element.get_attribute('content')
-                    if content:
-                        # Try to parse duration (could be in seconds or ISO 8601 format)
-                        try:
-                            return float(content)
-                        except ValueError:
-                            # Handle ISO 8601 duration format (PT1M30S)
-                            if content.startswith('PT'):
-                                return self._parse_iso_duration(content)
-        except Exception:
-            pass
+    async def _extract_from_page(self, url: str, host: str) -> VideoMetadata:
+        """
+        Extract video metadata using headless browser.
         
-        return None
-    
-    async def _extract_thumbnail(self, page) -> str:
-        """Extract thumbnail URL from meta tags."""
-        try:
-            # Try og:image first
-            og_image_element = await page.query_selector('meta[property="og:image"]')
-            if og_image_element:
-                thumbnail = await og_image_element.get_attribute('content')
-                if thumbnail:
-                    return thumbnail
+        Args:
+            url: The video URL to extract metadata from
+            host: The URL's host without www., used when the page names no site
             
-            # Try twitter:image
-            twitter_image_element = await page.query_selector('meta[name="twitter:image"]')
-            if twitter_image_element:
-                thumbnail = await twitter_image_element.get_attribute('content')
-                if thumbnail:
-                    return thumbnail
-                    
-        except Exception:
-            pass
-        
-        return None
-    
-    def _parse_iso_duration(self, duration_str: str) -> float:
-        """Parse ISO 8601 duration format (PT1M30S) to seconds."""
-        try:
-            import re
-            # Remove PT prefix
-            duration_str = duration_str[2:]
+        Returns:
+            VideoMetadata: Extracted metadata
+        """
+        async with browser_pool.context(
+            reuse_key=f"metadata:{origin_of(url)}",
+            setup=_setup_metadata_context,
+            user_agent=settings.USER_AGENT
+        ) as context:
+            page = await open_page(context)
             
-            # Extract hours, minutes, seconds
-            hours = 0
-            minutes = 0
-            seconds = 0
+            # Meta tags are in the initial HTML - no need to wait for trackers and ads
+            await page.goto(url, wait_until='domcontentloaded', timeout=settings.BROWSER_TIMEOUT)
             
-            # Hours
-            h_match = re.search(r'(\d+)H', duration_str)
-            if h_match:
-                hours = int(h_match.group(1))
+            # Read every meta tag in a single round-trip to the browser
+            tags = await page.evaluate(_META_TAGS_SCRIPT)
             
-            # Minutes
-            m_match = re.search(r'(\d+)M', duration_str)
-            if m_match:
-                minutes = int(m_match.group(1))
+            return _metadata_from_tags(tags, host)
+    
+    async def _extract_over_http(self, url: str, host: str) -> Optional[VideoMetadata]:
+        """
+        Extract video metadata without a browser, via oEmbed or the raw HTML.
+        
+        oEmbed responses without a description (YouTube's never have one)
+        are completed with the description and duration from the page head.
+        
+        Args:
+            url: The video URL to extract metadata from
+            host: The URL's host without www.
             
-            # Seconds
-            s_match = re.search(r'(\d+(?:\.\d+)?)S', duration_str)
-            if s_match:
-                seconds = float(s_match.group(1))
+        Returns:
+            VideoMetadata or None if the page needs a browser to render its tags
+        """
+        client = self._get_http_client()
+        oembed = None
+        
+        try:
+            oembed_endpoint = _OEMBED_ENDPOINTS.get(host)
+            if oembed_endpoint:
+                response = await client.get(oembed_endpoint, params={'url': url, 'format': 'json'})
+                if response.status_code == 200:
+                    oembed = _metadata_from_oembed(response.json(), host)
+                    if oembed is not None and oembed.description:
+                        return oembed
             
-            return hours * 3600 + minutes * 60 + seconds
+            response = await client.get(url)
+            if response.status_code != 200 or 'html' not in response.headers.get('content-type', ''):
+                return oembed
             
-        except Exception:
-            return 0.0
+            tags = await asyncio.to_thread(_read_meta_tags, response.text)
+        except (httpx.HTTPError, ValueError):
+            return oembed
+        
+        if oembed is not None:
+            oembed.description = _clean_text(tags["description"], _MAX_DESCRIPTION_LENGTH)
+            if oembed.duration is None:
+                oembed.duration = _parse_duration(tags["durations"])
+            return oembed
+        
+        # Without any meta tags the page is most likely rendered by JavaScript
+        if not tags["title"] or not (tags["description"] or tags["thumbnail"]):
+            return None
+        return _metadata_from_tags(tags, host)
+    
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """Get the shared HTTP client, reusing connections across extractions."""
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient(
+                follow_redirects=True,
+                timeout=settings.METADATA_HTTP_TIMEOUT,
+                headers={'User-Agent': settings.USER_AGENT, 'Accept-Language': 'en-US,en;q=0.9'}
+            )
+        return self._http_client
+    
+    async def close(self) -> None:
+        """Close the shared HTTP client."""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
 
 
 # Global metadata service instance
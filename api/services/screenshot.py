@@ -1,32 +1,329 @@
+import asyncio
 import io
-from typing import Optional
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
 from PIL import Image
-from playwright.async_api import async_playwright
 from ..config.settings import settings
+from ..services.browser_pool import block_static_assets, block_trackers, browser_pool, open_page, origin_of
+from ..services.storage import storage_service
+from ..services.ytdlp import seek_position, ytdlp_screenshot_service
+from ..utils.blocklist import CONSENT_COOKIES
+from ..utils.cache import CacheManager
 import re
-import requests
-from PIL import Image, ImageDraw, ImageFont
+import httpx
+from PIL import Image, ImageDraw, ImageFont, features
+
+try:
+    import pyvips
+except (ImportError, OSError):  # pyvips or the libvips library is not installed
+    pyvips = None
+
+logger = logging.getLogger(__name__)
+
+
+# Stealth scripts to avoid detection, installed once per browser context
+_STEALTH_SCRIPT = """
+    // Remove webdriver property
+    Object.defineProperty(navigator, 'webdriver', {
+        get: () => undefined,
+    });
+    
+    // Mock plugins
+    Object.defineProperty(navigator, 'plugins', {
+        get: () => [1, 2, 3, 4, 5],
+    });
+    
+    // Mock languages
+    Object.defineProperty(navigator, 'languages', {
+        get: () => ['en-US', 'en'],
+    });
+"""
+
+
+# Whole capture preparation in one round-trip: find the video, raise quality,
+# play muted until a frame is decoded, seek or pause, hide the player chrome.
+# Resolves with the clip rectangle of the video once the target frame is presented.
+_CAPTURE_SCRIPT = """async ({target, selectors, playSelectors, timeout}) => {
+    const deadline = Date.now() + timeout;
+    const findVideo = () => {
+        for (const selector of selectors) {
+            const video = document.querySelector(selector);
+            if (video) return video;
+        }
+        return null;
+    };
+
+    // Find the video as soon as it is inserted, clicking a play button once if the player is lazy
+    let clickedPlay = false;
+    const video = await new Promise(resolve => {
+        const observer = new MutationObserver(() => check());
+        const finish = value => {
+            observer.disconnect();
+            resolve(value);
+        };
+        const check = () => {
+            const found = findVideo();
+            if (found) return finish(found);
+            if (!clickedPlay) {
+                const button = document.querySelector(playSelectors.join(", "));
+                if (button) {
+                    button.click();
+                    clickedPlay = true;
+                }
+            }
+        };
+        observer.observe(document, {childList: true, subtree: true});
+        setTimeout(() => finish(findVideo()), timeout);
+        check();
+    });
+    if (!video) return {ok: false, reason: "no video element"};
+
+    // Highest available quality through the YouTube player API
+    const player = document.querySelector("#movie_player");
+    if (player && player.setPlaybackQualityRange) {
+        player.setPlaybackQualityRange("hd2160", "hd2160");
+        player.setPlaybackQuality("hd2160");
+    } else if (player && player.setPlaybackQuality) {
+        player.setPlaybackQuality("hd1080");
+    }
+
+    // Play muted with a simulated user presence until a frame is decoded
+    document.dispatchEvent(new Event("mousemove"));
+    document.dispatchEvent(new Event("click"));
+    video.muted = true;
+    video.play().catch(() => {});
+    const hasFrame = () => video.readyState >= 2 && video.videoWidth > 0 && video.videoHeight > 0;
+    if (!hasFrame()) {
+        await new Promise(resolve => {
+            const check = () => { if (hasFrame()) resolve(); };
+            video.addEventListener("loadeddata", check);
+            video.addEventListener("canplay", check);
+            video.addEventListener("resize", check);
+            setTimeout(resolve, Math.max(0, deadline - Date.now()));
+        });
+    }
+    if (!hasFrame()) return {ok: false, reason: "no decoded frame", readyState: video.readyState};
+
+    // Pause and seek, resolving once the frame at the target time is presented
+    video.pause();
+    if (target > 0 && Math.abs(video.currentTime - target) >= 0.05) {
+        await new Promise(resolve => {
+            const presented = () => video.requestVideoFrameCallback
+                ? video.requestVideoFrameCallback(() => resolve())
+                : setTimeout(resolve, 200);
+            video.addEventListener("seeked", presented, {once: true});
+            setTimeout(resolve, 3000);  // Never hang on a stalled seek
+            video.currentTime = target;
+        });
+    }
+
+    // Hide YouTube player controls and overlays for a clean frame
+    document.querySelectorAll(
+        ".ytp-chrome-bottom, .ytp-chrome-top, .ytp-gradient-bottom, .ytp-gradient-top, " +
+        ".ytp-progress-bar-container, .ytp-chrome-controls, .ytp-pause-overlay, " +
+        ".ytp-paid-content-overlay, .ytp-ce-element"
+    ).forEach(el => { el.style.display = "none"; });
+
+    const rect = video.getBoundingClientRect();
+    if (!rect.width || !rect.height) return {ok: false, reason: "video has no size"};
+    return {
+        ok: true,
+        currentTime: video.currentTime,
+        clip: {x: rect.x + window.scrollX, y: rect.y + window.scrollY, width: rect.width, height: rect.height}
+    };
+}"""
+
+# The capture routine is installed once per context as a hidden window property,
+# so each capture only sends this one-line call and its arguments over CDP
+_CAPTURE_INIT_SCRIPT = (
+    "Object.defineProperty(window, '__t1meCapture', {value: " + _CAPTURE_SCRIPT + ", enumerable: false});"
+)
+_CAPTURE_CALL = "args => window.__t1meCapture(args)"
+
+# Everything a screenshot context injects into each document, registered in one call
+_CONTEXT_INIT_SCRIPT = _STEALTH_SCRIPT + "\n" + _CAPTURE_INIT_SCRIPT
+
+# Extra seconds a batched capture may take per timestamp after the first
+_EXTRA_FRAME_BUDGET = 5.0
+
+# Video ID from watch (v anywhere in the query), embed, /v/, shorts, live, attribution
+# (URL-encoded watch path in u=) and youtu.be links, including youtube-nocookie.com, in one pass
+_YOUTUBE_ID_RE = re.compile(
+    r'(?:youtube(?:-nocookie)?\.com/(?:watch\?(?:[^#]*&)?v=|embed/|v/|shorts/|live/'
+    r'|attribution_link\?(?:[^#]*&)?u=(?:/|%2F)watch(?:\?|%3F)(?:[^#&]*?(?:&|%26))?v(?:=|%3D))'
+    r'|youtu\.be/)([a-zA-Z0-9_-]{11})',
+    re.IGNORECASE
+)
+
+# A bare video ID passed instead of a URL
+_YOUTUBE_ID_FULL_RE = re.compile(r'[A-Za-z0-9_-]{11}')
+
+# Resized fallback thumbnails kept in memory, keyed by video ID and size
+_THUMBNAIL_CACHE_SIZE = 64
+# Largest thumbnail body read - maxres JPEGs are well under this
+_THUMBNAIL_MAX_BYTES = 2_000_000
+
+# Fixed Pillow resize filters selectable with SCREENSHOT_RESIZE_FILTER; anything else means auto
+_RESIZE_FILTERS = {
+    'bilinear': Image.Resampling.BILINEAR,
+    'bicubic': Image.Resampling.BICUBIC,
+    'lanczos': Image.Resampling.LANCZOS
+}
+
+# Timestamp overlay font, loaded once - falls back to Pillow's default without DejaVu
+try:
+    _OVERLAY_FONT = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 24)
+except OSError:
+    _OVERLAY_FONT = ImageFont.load_default()
+
+# Video element selectors in order of preference, YouTube first
+_VIDEO_SELECTORS = [
+    'video.video-stream',
+    'video[src]',
+    'video',
+    '.html5-video-player video',
+    '#movie_player video'
+]
+
+_PLAY_SELECTORS = [
+    '.ytp-large-play-button',
+    '.ytp-play-button',
+    'button[aria-label*="Play"]',
+    '.play-button'
+]
+
+
+def _capture_context_options(width: int, height: int) -> Dict[str, Any]:
+    """Browser.new_context options shared by every screenshot context."""
+    return {
+        'viewport': {'width': width, 'height': height},
+        'device_scale_factor': 1,
+        'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+        'locale': 'en-US',
+        'timezone_id': 'America/New_York',
+        'extra_http_headers': {
+            'Accept-Language': 'en-US,en;q=0.9',
+            'Accept-Encoding': 'gzip, deflate, br',
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8'
+        }
+    }
+
+
+async def _setup_capture_context(context) -> None:
+    """Prepare a new screenshot context before its first use."""
+    await context.add_init_script(_CONTEXT_INIT_SCRIPT)
+    await block_trackers(context)
+    await block_static_assets(context)
 
 
 class ScreenshotService:
     """Service for capturing video screenshots using Playwright."""
     
     def __init__(self):
-        pass
+        # Cache filename -> task producing that screenshot, shared by concurrent callers
+        self._inflight: Dict[str, asyncio.Task] = {}
+        # Cache writes still running after their screenshot was returned
+        self._pending_saves: Set[asyncio.Task] = set()
+        self._http_client: Optional[httpx.AsyncClient] = None
+        # (video ID, width, height) -> resized thumbnail, least recently used first
+        self._thumbnails: OrderedDict[Tuple[str, int, int], Image.Image] = OrderedDict()
+    
+    async def get_screenshot(self, url: str, timestamp: float, width: int, height: int) -> Optional[bytes]:
+        """
+        Get a processed screenshot, captured only if it is not cached in memory or on disk.
+        
+        Concurrent requests for the same parameters await one shared task,
+        which keeps running if any single caller disconnects.
+        
+        Args:
+            url: Video URL
+            timestamp: Timestamp in seconds
+            width: Screenshot width
+            height: Screenshot height
+            
+        Returns:
+            JPEG bytes or None if capture failed
+        """
+        # Capture exactly the timestamp the cache key stands for
+        timestamp = CacheManager.normalize_timestamp(timestamp)
+        cache_filename = f"{CacheManager.generate_cache_key(url, timestamp, width, height)}.jpg"
+        
+        task = self._inflight.get(cache_filename)
+        if task is None:
+            task = asyncio.create_task(
+                self._load_or_capture(cache_filename, url, timestamp, width, height)
+            )
+            self._inflight[cache_filename] = task
+            task.add_done_callback(lambda _: self._inflight.pop(cache_filename, None))
+        
+        return await asyncio.shield(task)
+    
+    async def _load_or_capture(
+        self,
+        cache_filename: str,
+        url: str,
+        timestamp: float,
+        width: int,
+        height: int
+    ) -> Optional[bytes]:
+        """
+        Read a screenshot from the disk cache, or capture and process it.
+        
+        A new capture is returned without waiting for its cache file to be
+        written; the write runs in the background.
+        """
+        cached = await storage_service.load_screenshot(cache_filename)
+        if cached:
+            return cached
+        
+        screenshot_bytes = await self.capture_video_screenshot(url, timestamp, width, height)
+        if not screenshot_bytes:
+            return None
+        
+        processed_bytes = await self.process_screenshot(screenshot_bytes, width, height)
+        
+        # Scheduled before this task completes, so the screenshot is in the memory
+        # cache by the time the in-flight entry is dropped
+        save = asyncio.create_task(storage_service.save_screenshot(cache_filename, processed_bytes))
+        self._pending_saves.add(save)
+        save.add_done_callback(self._save_done)
+        return processed_bytes
+    
+    def _save_done(self, task: asyncio.Task) -> None:
+        """Forget a finished background cache write, logging it if it failed."""
+        self._pending_saves.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Failed to write screenshot to cache: %s", task.exception())
+    
+    async def warm_up(self) -> None:
+        """
+        Load the player page once in a warm screenshot context at startup.
+        
+        The context is kept warm afterwards with the player's scripts in its
+        HTTP cache, so the first capture does not download them. Failures
+        are logged, not raised.
+        """
+        if not settings.SCREENSHOT_WARMUP_URL:
+            return
+        
+        try:
+            async with browser_pool.context(
+                reuse_key=f"screenshot:{origin_of(settings.SCREENSHOT_WARMUP_URL)}",
+                setup=_setup_capture_context,
+                **_capture_context_options(settings.DEFAULT_WIDTH, settings.DEFAULT_HEIGHT)
+            ) as context:
+                page = await open_page(context)
+                await page.goto(settings.SCREENSHOT_WARMUP_URL, wait_until='load', timeout=30000)
+        except Exception as e:
+            logger.warning("Screenshot warm-up failed: %s", e)
     
     def extract_youtube_video_id(self, url: str) -> Optional[str]:
         """Extract YouTube video ID from URL"""
-        patterns = [
-            r'(?:youtube\.com/watch\?v=|youtu\.be/)([a-zA-Z0-9_-]{11})',
-            r'youtube\.com/embed/([a-zA-Z0-9_-]{11})',
-            r'youtube\.com/v/([a-zA-Z0-9_-]{11})'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, url)
-            if match:
-                return match.group(1)
-        return None
+        if len(url) == 11 and _YOUTUBE_ID_FULL_RE.fullmatch(url):
+            return url
+        match = _YOUTUBE_ID_RE.search(url)
+        return match.group(1) if match else None
     
     async def create_youtube_thumbnail_fallback(self, url: str, timestamp: float, width: int, height: int) -> Optional[bytes]:
         """Create fallback screenshot using YouTube thumbnail with timestamp overlay"""
@@ -35,70 +332,94 @@ class ScreenshotService:
             if not video_id:
                 return None
             
-            print(f"📷 Creating YouTube thumbnail fallback for {video_id} at {timestamp}s")
-            
-            # Try different YouTube thumbnail qualities
-            thumbnail_urls = [
-                f"https://i.ytimg.com/vi/{video_id}/maxresdefault.jpg",  # 1280x720
-                f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg",     # 480x360
-                f"https://i.ytimg.com/vi/{video_id}/mqdefault.jpg"      # 320x180
-            ]
-            
-            thumbnail_data = None
-            for thumbnail_url in thumbnail_urls:
-                try:
-                    response = requests.get(thumbnail_url, timeout=10)
-                    if response.status_code == 200 and len(response.content) > 1000:  # Not a placeholder
-                        thumbnail_data = response.content
-                        break
-                except:
-                    continue
+            logger.info("Creating YouTube thumbnail fallback for %s at %ss", video_id, timestamp)
             
-            if not thumbnail_data:
+            thumbnail = await self._get_thumbnail(video_id, width, height)
+            if thumbnail is None:
                 return None
-            
-            # Load and resize thumbnail
-            image = Image.open(io.BytesIO(thumbnail_data))
-            image = image.resize((width, height), Image.Resampling.LANCZOS)
-            
-            # Add timestamp overlay
-            draw = ImageDraw.Draw(image)
-            
-            # Format timestamp
-            minutes = int(timestamp // 60)
-            seconds = int(timestamp % 60)
-            time_text = f"{minutes}:{seconds:02d}"
-            
-            # Try to use a system font, fallback to default
-            try:
-                font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 24)
-            except:
-                font = ImageFont.load_default()
-            
-            # Add semi-transparent background for text
-            text_bbox = draw.textbbox((0, 0), time_text, font=font)
-            text_width = text_bbox[2] - text_bbox[0]
-            text_height = text_bbox[3] - text_bbox[1]
-            
-            # Position in bottom-right corner
-            x = width - text_width - 20
-            y = height - text_height - 20
-            
-            # Draw background rectangle
-            draw.rectangle([x-10, y-5, x+text_width+10, y+text_height+5], fill=(0, 0, 0, 128))
-            
-            # Draw timestamp text
-            draw.text((x, y), time_text, fill=(255, 255, 255), font=font)
-            
-            # Convert to bytes
-            output = io.BytesIO()
-            image.save(output, format='PNG')
-            return output.getvalue()
+            # Drawing and encoding are CPU-bound - keep them off the event loop
+            return await asyncio.to_thread(_render_thumbnail_fallback, thumbnail, timestamp)
             
         except Exception as e:
-            print(f"❌ YouTube thumbnail fallback failed: {e}")
+            logger.warning("YouTube thumbnail fallback failed: %s", e)
             return None
     
+    async def _get_thumbnail(self, video_id: str, width: int, height: int) -> Optional[Image.Image]:
+        """
+        Get the best available YouTube thumbnail resized to the target size.
+        
+        Args:
+            video_id: YouTube video ID
+            width: Target width
+            height: Target height
+            
+        Returns:
+            Resized thumbnail, shared between callers, or None if none could be fetched
+        """
+        key = (video_id, width, height)
+        thumbnail = self._thumbnails.get(key)
+        if thumbnail is not None:
+            self._thumbnails.move_to_end(key)
+            return thumbnail
+        
+        # Try different YouTube thumbnail qualities
+        thumbnail_urls = [
+            f"https://i.ytimg.com/vi/{video_id}/maxresdefault.jpg",  # 1280x720
+            f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg",     # 480x360
+            f"https://i.ytimg.com/vi/{video_id}/mqdefault.jpg"      # 320x180
+        ]
+        
+        # Request every quality at once - maxres is missing for many videos
+        bodies = await asyncio.gather(
+            *(self._fetch_thumbnail(thumbnail_url) for thumbnail_url in thumbnail_urls)
+        )
+        thumbnail_data = next((body for body in bodies if body), None)  # Best quality first
+        
+        if not thumbnail_data:
+            return None
+        
+        thumbnail = await asyncio.to_thread(_resize_thumbnail, thumbnail_data, width, height)
+        
+        self._thumbnails[key] = thumbnail
+        while len(self._thumbnails) > _THUMBNAIL_CACHE_SIZE:
+            self._thumbnails.popitem(last=False)
+        return thumbnail
+    
+    async def _fetch_thumbnail(self, thumbnail_url: str) -> Optional[bytes]:
+        """Download one thumbnail, giving up early on errors, non-images and oversized bodies."""
+        try:
+            async with self._get_http_client().stream('GET', thumbnail_url) as response:
+                if response.status_code != 200 or not response.headers.get('content-type', '').startswith('image/'):
+                    return None
+                if int(response.headers.get('content-length') or 0) > _THUMBNAIL_MAX_BYTES:
+                    return None
+                
+                body = bytearray()
+                async for chunk in response.aiter_bytes():
+                    body += chunk
+                    if len(body) > _THUMBNAIL_MAX_BYTES:
+                        return None
+        except (httpx.HTTPError, ValueError):
+            return None
+        return bytes(body) if len(body) > 1000 else None  # Not a placeholder
+    
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """Get the shared HTTP client, keeping thumbnail connections alive across fallbacks."""
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient(
+                timeout=10,
+                limits=httpx.Limits(max_keepalive_connections=32, max_connections=64)
+            )
+        return self._http_client
+    
+    async def close(self) -> None:
+        """Finish pending cache writes and close the shared HTTP client."""
+        if self._pending_saves:
+            await asyncio.gather(*self._pending_saves, return_exceptions=True)
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+    
     async def capture_video_screenshot(
         self, 
         url: str, 
@@ -118,428 +439,182 @@ class ScreenshotService:
         Returns:
             Screenshot bytes or None if failed
         """
-        print(f"🎬 Starting fresh screenshot for {url}")
-        async with async_playwright() as p:
-            # Launch fresh browser for each request to avoid state issues
-            browser = await p.chromium.launch(
-                headless=True,  # Required for Docker/production environment
-                args=[
-                    '--no-sandbox',
-                    '--disable-setuid-sandbox',
-                    '--disable-dev-shm-usage',
-                    '--disable-accelerated-2d-canvas',
-                    '--no-first-run',
-                    '--no-zygote',
-                    '--disable-gpu',
-                    '--disable-web-security',
-                    '--disable-features=VizDisplayCompositor',
-                    '--disable-background-timer-throttling',
-                    '--disable-backgrounding-occluded-windows',
-                    '--disable-renderer-backgrounding',
-                    '--autoplay-policy=no-user-gesture-required',
-                    '--disable-extensions',
-                    '--disable-plugins',
-                    '--mute-audio',
-                    '--disable-blink-features=AutomationControlled',
-                    '--disable-ipc-flooding-protection',
-                    '--force-device-scale-factor=1',
-                    '--disable-features=VizDisplayCompositor,VizHitTestSurfaceLayer',
-                    '--disable-backgrounding-occluded-windows',
-                    '--disable-renderer-backgrounding',
-                    '--disable-background-timer-throttling',
-                    '--disable-field-trial-config',
-                    '--no-default-browser-check',
-                    '--no-first-run',
-                    '--disable-default-apps'
-                ]
-            )
+        screenshots = await self.capture_video_screenshots(url, [timestamp], width, height)
+        return screenshots[0]
+    
+    async def capture_video_screenshots(
+        self,
+        url: str,
+        timestamps: List[float],
+        width: int,
+        height: int
+    ) -> List[Optional[bytes]]:
+        """
+        Capture screenshots from a video at several timestamps.
+        
+        The video page is loaded once; every further timestamp only costs
+        a seek and a screenshot in the same page.
+        
+        Args:
+            url: Video URL
+            timestamps: Timestamps in seconds
+            width: Screenshot width
+            height: Screenshot height
             
-            try:
-                context = await browser.new_context(
-                    viewport={'width': width, 'height': height},
-                    user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                    locale='en-US',
-                    timezone_id='America/New_York',
-                    extra_http_headers={
-                        'Accept-Language': 'en-US,en;q=0.9',
-                        'Accept-Encoding': 'gzip, deflate, br',
-                        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8'
-                    }
-                )
-                
-                # Add stealth scripts to avoid detection
-                await context.add_init_script("""
-                    // Remove webdriver property
-                    Object.defineProperty(navigator, 'webdriver', {
-                        get: () => undefined,
-                    });
-                    
-                    // Mock plugins
-                    Object.defineProperty(navigator, 'plugins', {
-                        get: () => [1, 2, 3, 4, 5],
-                    });
-                    
-                    // Mock languages
-                    Object.defineProperty(navigator, 'languages', {
-                        get: () => ['en-US', 'en'],
-                    });
-                """)
-                
-                page = await context.new_page()
-                
-                # Convert youtu.be URLs to direct youtube.com URLs to bypass consent
-                if 'youtu.be' in url:
-                    video_id = url.split('/')[-1].split('?')[0]
-                    youtube_url = f"https://www.youtube.com/watch?v={video_id}"
-                    if 't=' in url:
-                        timestamp_param = url.split('t=')[1].split('&')[0]
-                        youtube_url += f"&t={timestamp_param}"
-                    print(f"Converting to direct YouTube URL: {youtube_url}")
-                    url = youtube_url
-                
-                # Navigate directly to the video URL
-                print(f"Navigating to URL: {url}")
-                await page.goto(url, wait_until='domcontentloaded', timeout=30000)
-                
-                # Fast video element detection - no waiting around!
-                print("Fast video detection...")
-                await page.wait_for_timeout(100)  # Minimal wait
-                
-                # Try to find video element with YouTube-specific approach
-                video_found = False
-                video_element = None
-                
-                # YouTube-specific selectors in order of preference
-                youtube_selectors = [
-                    'video.video-stream',  # Primary YouTube video element
-                    'video[src]',          # Any video with src
-                    'video',               # Any video element
-                    '.html5-video-player video',  # YouTube HTML5 player
-                    '#movie_player video'  # YouTube movie player
-                ]
-                
-                for selector in youtube_selectors:
-                    try:
-                        print(f"Trying selector: {selector}")
-                        await page.wait_for_selector(selector, timeout=2000)  # Fast timeout
-                        video_element = await page.query_selector(selector)
-                        if video_element:
-                            print(f"Found video element with selector: {selector}")
-                            video_found = True
-                            break
-                    except Exception as e:
-                        print(f"Selector {selector} failed: {e}")
+        Returns:
+            Screenshot bytes or None per timestamp, in the order given
+        """
+        logger.info("Starting fresh screenshots for %s at %s", url, timestamps)
+        screenshots: List[Optional[bytes]] = [None] * len(timestamps)
+        video_id = self.extract_youtube_video_id(url)
+        
+        # A single frame straight from the stream is far cheaper than rendering the player
+        if video_id and ytdlp_screenshot_service.available:
+            for i, timestamp in enumerate(timestamps):
+                screenshots[i] = await ytdlp_screenshot_service.capture_frame(video_id, timestamp, width, height)
+                if screenshots[i] is None:
+                    break  # Stream unreadable - the rest would fail the same way
+        
+        pending = [i for i, screenshot in enumerate(screenshots) if screenshot is None]
+        if not pending:
+            return screenshots
+        
+        try:
+            await self._capture_in_browser(url, video_id, timestamps, pending, screenshots, width, height)
+        except Exception as e:
+            if isinstance(e, asyncio.TimeoutError):
+                logger.warning("capture_video_screenshots timed out url=%s ts=%s", url, timestamps)
+            else:
+                logger.exception("capture_video_screenshots failed url=%s ts=%s", url, timestamps)
+            
+            # Try YouTube thumbnail fallback for YouTube URLs
+            if video_id:
+                for i in pending:
+                    if screenshots[i] is not None:
                         continue
-                
-                if not video_found:
-                    # Quick play button attempt - no long waits
+                    logger.info("Attempting YouTube thumbnail fallback for %s at %ss", url, timestamps[i])
                     try:
-                        print("Quick play button attempt...")
-                        play_selectors = [
-                            '.ytp-large-play-button',
-                            '.ytp-play-button',
-                            'button[aria-label*="Play"]',
-                            '.play-button'
-                        ]
-                        
-                        for play_selector in play_selectors:
-                            try:
-                                play_button = await page.query_selector(play_selector)
-                                if play_button:
-                                    await play_button.click()
-                                    await page.wait_for_timeout(500)  # Quick wait
-                                    
-                                    # Quick video check after play
-                                    for selector in youtube_selectors:
-                                        try:
-                                            await page.wait_for_selector(selector, timeout=1000)  # Fast
-                                            video_element = await page.query_selector(selector)
-                                            if video_element:
-                                                print(f"Found video after play click: {selector}")
-                                                video_found = True
-                                                break
-                                        except:
-                                            continue
-                                    
-                                    if video_found:
-                                        break
-                            except:
-                                continue
-                    except Exception as e:
-                        print(f"Play button click failed: {e}")
-                
-                if not video_found:
-                    print(f"No video element found for URL: {url}")
-                    print("Page content:")
-                    content = await page.content()
-                    print(content[:1000])  # Print first 1000 chars for debugging
-                    return None
-                    
-                # Force maximum video quality
-                await page.evaluate('''
-                    (() => {
-                        // For YouTube, set quality to highest available
-                        if (window.location.hostname.includes('youtube.com') || window.location.hostname.includes('youtu.be')) {
-                            const video = document.querySelector('video');
-                            if (video && video.getVideoPlaybackQuality) {
-                                // Try to access YouTube's internal player API
-                                const player = document.querySelector('#movie_player');
-                                if (player && player.setPlaybackQualityRange) {
-                                    player.setPlaybackQualityRange('hd2160', 'hd2160'); // 4K
-                                    player.setPlaybackQuality('hd2160');
-                                } else if (player && player.setPlaybackQuality) {
-                                    player.setPlaybackQuality('hd1080'); // 1080p fallback
-                                }
-                            }
-                        }
-                        
-                        // For other platforms, try to set video quality via standard methods
-                        const video = document.querySelector('video');
-                        if (video) {
-                            // Set video to highest quality if quality selector exists
-                            const qualityButtons = document.querySelectorAll('[data-quality], .quality-selector, .vjs-quality-selector');
-                            if (qualityButtons.length > 0) {
-                                const highestQuality = Array.from(qualityButtons).find(btn => 
-                                    btn.textContent.includes('1080') || 
-                                    btn.textContent.includes('720') ||
-                                    btn.textContent.includes('HD')
-                                );
-                                if (highestQuality) {
-                                    highestQuality.click();
-                                }
-                            }
-                        }
-                    })()
-                ''')
-                
-                # Wait for quality change to take effect
-                await page.wait_for_timeout(100)
-                
-                # Get the video element
-                video_element = await page.query_selector('video')
-                if not video_element:
-                    return None
-                
-                # Simulate realistic user behavior to avoid bot detection
-                print("Simulating user interaction...")
-                
-                # Move mouse to center of page
-                await page.mouse.move(width // 2, height // 2)
-                await page.wait_for_timeout(100)
-                
-                # Click on the page to "focus" it
-                await page.click('body')
-                await page.wait_for_timeout(200)
-                
-                # Quick video setup with user simulation
-                print("Quick video setup with user simulation...")
-                video_setup_success = False
-                try:
-                    await __import__('asyncio').wait_for(
-                        page.evaluate('''
-                            (() => {
-                                // Simulate user presence
-                                document.dispatchEvent(new Event('mousemove'));
-                                document.dispatchEvent(new Event('click'));
-                                
-                                const video = document.querySelector("video");
-                                if (video) {
-                                    video.muted = true;
-                                    // Simulate user clicking play
-                                    video.dispatchEvent(new Event('click'));
-                                    video.play().catch(e => console.log("Play failed:", e));
-                                }
-                            })()
-                        '''),
-                        timeout=5.0
-                    )
-                    print("✅ Video setup with user simulation completed")
-                    video_setup_success = True
-                except Exception as e:
-                    print(f"⚠️ Video setup timeout/failed: {e}")
-                    print("Attempting simpler video setup...")
-                    
-                    # Try clicking the actual play button
-                    try:
-                        play_button = await page.query_selector('.ytp-large-play-button, .ytp-play-button')
-                        if play_button:
-                            await play_button.click()
-                            await page.wait_for_timeout(500)
-                        
-                        await page.evaluate('document.querySelector("video").muted = true')
-                        await page.wait_for_timeout(1000)
-                        video_setup_success = True
-                        print("✅ Simple video setup completed")
-                    except:
-                        print("❌ Video setup completely failed - may get black screenshot")
-                
-                # Minimal wait for video to start
-                await page.wait_for_timeout(100)
-                
-                # Check if video has actual content (not black)
-                try:
-                    video_ready = await __import__('asyncio').wait_for(
-                        page.evaluate('''
-                            (() => {
-                                const video = document.querySelector("video");
-                                if (!video) return false;
-                                
-                                // Check if video has loaded some data
-                                const hasData = video.readyState >= 2; // HAVE_CURRENT_DATA
-                                const hasSize = video.videoWidth > 0 && video.videoHeight > 0;
-                                const duration = video.duration > 0;
-                                
-                                console.log("Video readyState:", video.readyState);
-                                console.log("Video dimensions:", video.videoWidth, "x", video.videoHeight);
-                                console.log("Video duration:", video.duration);
-                                
-                                return hasData && hasSize && duration;
-                            })()
-                        '''),
-                        timeout=3.0
-                    )
-                    print(f"✅ Video ready check completed")
-                except Exception as e:
-                    print(f"⚠️ Video ready check failed/timeout: {e}")
-                    video_ready = False
-                
-                if not video_ready:
-                    print("Video not ready, attempting to load content...")
-                    
-                    # Try to force video to load by playing and waiting
-                    try:
-                        await __import__('asyncio').wait_for(
-                            page.evaluate('''
-                                (() => {
-                                    const video = document.querySelector("video");
-                                    if (video) {
-                                        video.muted = true;
-                                        video.currentTime = 0;
-                                        video.play();
-                                    }
-                                })()
-                            '''),
-                            timeout=3.0
-                        )
-                        await page.wait_for_timeout(2000)  # Give more time for loading
-                        
-                        # Check if video actually has content now
-                        video_has_content = await __import__('asyncio').wait_for(
-                            page.evaluate('''
-                                (() => {
-                                    const video = document.querySelector("video");
-                                    if (!video) return false;
-                                    return video.videoWidth > 0 && video.videoHeight > 0 && video.readyState >= 2;
-                                })()
-                            '''),
-                            timeout=3.0
-                        )
-                        
-                        if not video_has_content:
-                            print("❌ Video still has no content - aborting to avoid black screenshot")
-                            return None
-                        else:
-                            print("✅ Video content loaded successfully")
-                            
-                    except Exception as e:
-                        print(f"❌ Failed to load video content: {e}")
-                        return None
-                
-                # Fast timestamp seeking - go back a few frames for stability
-                if timestamp > 0:
-                    # Seek back 0.5 seconds for more stable frame (avoid transitions)
-                    seek_time = max(0, timestamp + 0.6)
-                    print(f"Fast seek to: {seek_time} (requested: {timestamp})")
-                    await page.evaluate(f'''
-                        const video = document.querySelector("video");
-                        if (video) {{
-                            video.currentTime = {seek_time};
-                            video.pause();
-                        }}
-                    ''')
-                    
-                    # Quick seek verification
-                    await page.wait_for_timeout(100)
-                    current_time = await page.evaluate('document.querySelector("video").currentTime')
-                    print(f"Seeked to: {current_time} (target: {seek_time})")
-                    
-                    # One quick retry if needed
-                    if abs(current_time - seek_time) > 2:
-                        await page.evaluate(f'document.querySelector("video").currentTime = {seek_time}')
-                        await page.wait_for_timeout(100)
-                else:
-                    # Quick pause at start
-                    await page.evaluate('document.querySelector("video").pause()')
-                    await page.wait_for_timeout(100)
-                
-                # Hide YouTube player controls for cleaner screenshot
-                await page.evaluate('''
-                    (() => {
-                        // Hide YouTube player controls
-                        const controls = document.querySelectorAll(
-                            '.ytp-chrome-bottom, .ytp-chrome-top, .ytp-gradient-bottom, .ytp-gradient-top, ' +
-                            '.ytp-progress-bar-container, .ytp-chrome-controls, .ytp-pause-overlay, ' +
-                            '.ytp-big-mode .ytp-chrome-bottom, .ytp-big-mode .ytp-chrome-top'
-                        );
-                        controls.forEach(el => {
-                            if (el) el.style.display = 'none';
-                        });
-                        
-                        // Also hide any overlay elements
-                        const overlays = document.querySelectorAll('.ytp-paid-content-overlay, .ytp-ce-element');
-                        overlays.forEach(el => {
-                            if (el) el.style.display = 'none';
-                        });
-                    })()
-                ''');
-                
-                # Quick wait for controls to hide
-                await page.wait_for_timeout(100)
-                
-                # Take screenshot with detailed error logging
-                print("Taking screenshot of video element...")
-                try:
-                    screenshot_bytes = await video_element.screenshot(type='png')
-                    print(f"Screenshot captured successfully, size: {len(screenshot_bytes)} bytes")
-                    return screenshot_bytes
-                except Exception as screenshot_error:
-                    print(f"Screenshot capture failed: {screenshot_error}")
-                    try:
-                        video_details = await video_element.evaluate('el => ({tagName: el.tagName, width: el.videoWidth, height: el.videoHeight, readyState: el.readyState})')
-                        print(f"Video element details: {video_details}")
-                    except:
-                        print("Could not get video element details")
-                    raise screenshot_error
-                    
-            except Exception as e:
-                print(f"Error in capture_video_screenshot: {e}")
-                import traceback
-                print(f"Full traceback: {traceback.format_exc()}")
-                
-                # Try YouTube thumbnail fallback for YouTube URLs
-                if 'youtube.com' in url or 'youtu.be' in url:
-                    print(f"🔄 Attempting YouTube thumbnail fallback...")
-                    try:
-                        fallback_screenshot = await self.create_youtube_thumbnail_fallback(url, timestamp, width, height)
-                        if fallback_screenshot:
-                            print(f"✅ YouTube thumbnail fallback successful!")
-                            return fallback_screenshot
-                        else:
-                            print(f"❌ YouTube thumbnail fallback also failed")
+                        screenshots[i] = await self.create_youtube_thumbnail_fallback(url, timestamps[i], width, height)
+                        if screenshots[i] is None:
+                            logger.warning("YouTube thumbnail fallback also failed for %s", url)
                     except Exception as fallback_error:
-                        print(f"❌ YouTube thumbnail fallback error: {fallback_error}")
-                
-                return None
-            finally:
-                try:
-                    await browser.close()
-                except:
-                    pass
-
+                        logger.warning("YouTube thumbnail fallback error: %s", fallback_error)
+        
+        return screenshots
+    
+    async def _capture_in_browser(
+        self,
+        url: str,
+        video_id: Optional[str],
+        timestamps: List[float],
+        pending: List[int],
+        screenshots: List[Optional[bytes]],
+        width: int,
+        height: int
+    ) -> None:
+        """Load the video page once and fill in the pending screenshots by seeking."""
+        # YouTube: load the bare embed player, which skips the watch page's comments,
+        # recommendations and ads UI; the watch page covers videos with embedding disabled
+        if video_id:
+            page_urls = [
+                f"https://www.youtube.com/embed/{video_id}"
+                f"?autoplay=1&mute=1&playsinline=1&controls=0&modestbranding=1&start={int(timestamps[pending[0]])}",
+                f"https://www.youtube.com/watch?v={video_id}"
+            ]
+        else:
+            page_urls = [url]
+        
+        async with browser_pool.context(
+            reuse_key=f"screenshot:{origin_of(page_urls[0])}",
+            setup=_setup_capture_context,
+            **_capture_context_options(width, height)
+        ) as context:
+            # Bound the time a slot is held, so one stuck player cannot starve queued captures;
+            # frames captured before the deadline are kept
+            budget = settings.SCREENSHOT_TIMEOUT + _EXTRA_FRAME_BUDGET * (len(pending) - 1)
+            await asyncio.wait_for(
+                self._capture_on_page(context, url, page_urls, timestamps, pending, screenshots, width, height),
+                timeout=budget
+            )
+    
+    async def _capture_on_page(
+        self,
+        context,
+        url: str,
+        page_urls: List[str],
+        timestamps: List[float],
+        pending: List[int],
+        screenshots: List[Optional[bytes]],
+        width: int,
+        height: int
+    ) -> None:
+        """Navigate the context's page to the player and capture the pending timestamps."""
+        # Cookies are cleared between uses - answer consent prompts up front.
+        # Both only need to finish before navigation, so they share one round-trip.
+        _, page = await asyncio.gather(
+            context.add_cookies(CONSENT_COOKIES),
+            open_page(context)
+        )
+        
+        # Warm contexts keep the viewport they were created with
+        await page.set_viewport_size({'width': width, 'height': height})
+        
+        first, *rest = pending
+        for page_url in page_urls:
+            # Return once the response is committed - the capture script waits for the player itself
+            logger.debug("Navigating to URL: %s", page_url)
+            await page.goto(page_url, wait_until='commit', timeout=10000)
+            
+            screenshots[first] = await self._capture_frame(page, timestamps[first])
+            if screenshots[first]:
+                break
+        else:
+            logger.warning("Video not capturable for URL: %s", url)
+            if logger.isEnabledFor(logging.DEBUG):
+                content = await page.content()
+                logger.debug("Page content: %s", content[:1000])  # First 1000 chars for debugging
+            return
+        
+        # The player is up - further timestamps are just seeks
+        for i in rest:
+            screenshots[i] = await self._capture_frame(page, timestamps[i])
+    
+    async def _capture_frame(self, page, timestamp: float) -> Optional[bytes]:
+        """Seek the loaded video to a timestamp and screenshot it, None if it is not capturable."""
+        # Find, play, seek and clean up the player in a single evaluate
+        seek_time = seek_position(timestamp)
+        result = await asyncio.wait_for(
+            page.evaluate(_CAPTURE_CALL, {
+                'target': seek_time,
+                'selectors': _VIDEO_SELECTORS,
+                'playSelectors': _PLAY_SELECTORS,
+                'timeout': 12000  # Includes parsing the page, navigation only waits for commit
+            }),
+            timeout=20.0
+        )
+        if not result.get('ok'):
+            logger.debug("Video not capturable (%s) at %s", result.get('reason'), page.url)
+            return None
+        logger.debug("Seeked to: %s (target: %s)", result['currentTime'], seek_time)
+        
+        # Let Chromium encode JPEG directly - no PNG to decode when no resize is needed.
+        # Player CSS transitions (control fade-outs, spinners) are frozen so they never land in the frame.
+        screenshot_bytes = await page.screenshot(
+            type='jpeg',
+            quality=85,
+            clip=result['clip'],
+            animations='disabled'
+        )
+        logger.debug("Screenshot captured successfully, size: %d bytes", len(screenshot_bytes))
+        return screenshot_bytes
+    
     async def process_screenshot(self, screenshot_bytes: bytes, width: int, height: int) -> bytes:
         """
         Process and optimize the screenshot.
         
+        Decoding, resizing and encoding are CPU-bound, so they run in a
+        worker thread to keep the event loop responsive.
+        
         Args:
             screenshot_bytes: Raw screenshot bytes
             width: Target width
@@ -549,33 +624,144 @@ class ScreenshotService:
             Processed screenshot bytes
         """
         try:
-            # Open image with PIL
-            image = Image.open(io.BytesIO(screenshot_bytes))
-            
-            # Convert to RGB if necessary
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
-            
-            # Resize if needed
-            if image.size != (width, height):
-                image = image.resize((width, height), Image.Resampling.LANCZOS)
-            
-            # Save as JPEG with optimization
-            output = io.BytesIO()
-            image.save(
-                output, 
-                format='JPEG', 
-                quality=85, 
-                optimize=True,
-                progressive=True
-            )
-            
-            return output.getvalue()
-            
+            return await asyncio.to_thread(_encode_jpeg, screenshot_bytes, width, height)
         except Exception as e:
-            print(f"Error processing screenshot: {e}")
+            logger.warning("Error processing screenshot: %s", e)
             return screenshot_bytes  # Return original if processing fails
 
 
+def image_backend() -> Dict[str, Any]:
+    """
+    Describe the library doing screenshot resizing and JPEG encoding.
+    
+    Returns:
+        Dict with the encoder name and version, and whether Pillow's JPEG codec is libjpeg-turbo
+    """
+    if pyvips is not None:
+        encoder = f"libvips {pyvips.version(0)}.{pyvips.version(1)}.{pyvips.version(2)}"
+    else:
+        encoder = f"pillow {Image.__version__}"
+    return {
+        "encoder": encoder,
+        "pillow_libjpeg_turbo": bool(features.check_feature('libjpeg_turbo'))
+    }
+
+
+def _resize_thumbnail(thumbnail_data: bytes, width: int, height: int) -> Image.Image:
+    """Decode a YouTube thumbnail JPEG into an RGB image of the target size."""
+    # Load and resize thumbnail, letting libjpeg decode maxres at a reduced scale
+    image = Image.open(io.BytesIO(thumbnail_data))
+    image.draft('RGB', (width, height))
+    if image.size == (width, height):
+        image.load()  # Decode now so cached copies never touch the source bytes again
+        thumbnail = image
+    else:
+        thumbnail = image.resize((width, height), _resample_filter(image.width, width))
+        image.close()
+    # RGB, so each fallback encodes its copy of the cached image without converting
+    if thumbnail.mode != 'RGB':
+        thumbnail = thumbnail.convert('RGB')
+    return thumbnail
+
+
+def _render_thumbnail_fallback(thumbnail: Image.Image, timestamp: float) -> bytes:
+    """Draw the timestamp over a copy of a resized thumbnail and encode it as JPEG."""
+    width, height = thumbnail.size
+    # Only the overlay differs between timestamps - draw it on the one copy that gets encoded
+    image = thumbnail.copy()
+    
+    # Add timestamp overlay
+    draw = ImageDraw.Draw(image)
+    
+    # Format timestamp
+    minutes = int(timestamp // 60)
+    seconds = int(timestamp % 60)
+    time_text = f"{minutes}:{seconds:02d}"
+    
+    # Add semi-transparent background for text
+    font = _OVERLAY_FONT
+    text_bbox = font.getbbox(time_text)
+    text_width = text_bbox[2] - text_bbox[0]
+    text_height = text_bbox[3] - text_bbox[1]
+    
+    # Position in bottom-right corner
+    x = width - text_width - 20
+    y = height - text_height - 20
+    
+    # Draw background rectangle
+    draw.rectangle([x-10, y-5, x+text_width+10, y+text_height+5], fill=(0, 0, 0, 128))
+    
+    # Draw timestamp text
+    draw.text((x, y), time_text, fill=(255, 255, 255), font=font)
+    
+    # Convert to bytes - JPEG like every other capture, PNG is slow and large for photos.
+    # No optimize pass, as in _encode_jpeg_pil.
+    output = io.BytesIO()
+    image.save(output, format='JPEG', quality=85, progressive=True)
+    image.close()
+    return output.getvalue()
+
+
+def _resample_filter(source_width: int, width: int) -> Image.Resampling:
+    """
+    Pillow resize filter for a resize, as chosen by SCREENSHOT_RESIZE_FILTER.
+    
+    In auto mode bilinear is used up to a 2x downscale - it is indistinguishable
+    from Lanczos there after JPEG compression, at a fraction of the cost.
+    """
+    resample = _RESIZE_FILTERS.get(settings.SCREENSHOT_RESIZE_FILTER)
+    if resample is not None:
+        return resample
+    return Image.Resampling.LANCZOS if width < source_width / 2 else Image.Resampling.BILINEAR
+
+
+def _encode_jpeg(screenshot_bytes: bytes, width: int, height: int) -> bytes:
+    """Resize a screenshot to the target size and encode it as progressive JPEG."""
+    if pyvips is not None:
+        return _encode_jpeg_vips(screenshot_bytes, width, height)
+    return _encode_jpeg_pil(screenshot_bytes, width, height)
+
+
+def _encode_jpeg_vips(screenshot_bytes: bytes, width: int, height: int) -> bytes:
+    """libvips version of _encode_jpeg - SIMD codecs and shrink-on-load, no full-size copy."""
+    # Only the header is read here
+    source = pyvips.Image.new_from_buffer(screenshot_bytes, "", access="sequential")
+    if source.get('vips-loader').startswith('jpeg') and (source.width, source.height) == (width, height):
+        return screenshot_bytes
+    
+    image = pyvips.Image.thumbnail_buffer(screenshot_bytes, width, height=height, size='force')
+    if image.hasalpha():
+        image = image.flatten()
+    return image.jpegsave_buffer(Q=85, interlace=True)
+
+
+def _encode_jpeg_pil(screenshot_bytes: bytes, width: int, height: int) -> bytes:
+    """Pillow version of _encode_jpeg, used when libvips is not installed."""
+    # Open image with PIL - only the header is read until pixels are needed
+    with Image.open(io.BytesIO(screenshot_bytes)) as source:
+        # Browser JPEGs already at the target size are served as captured
+        if source.format == 'JPEG' and source.size == (width, height):
+            return screenshot_bytes
+        
+        # Let libjpeg decode large JPEGs at a reduced scale instead of full size
+        source.draft('RGB', (width, height))
+        
+        # Convert to RGB and resize, closing each intermediate copy right away
+        image = source.convert('RGB') if source.mode != 'RGB' else source.copy()
+    
+    try:
+        if image.size != (width, height):
+            resized = image.resize((width, height), _resample_filter(image.width, width))
+            image.close()
+            image = resized
+        
+        # Skip optimize=True - its extra Huffman pass doubles encode time for ~3% smaller files
+        output = io.BytesIO()
+        image.save(output, format='JPEG', quality=85, progressive=True)
+    finally:
+        image.close()
+    return output.getvalue()
+
+
 # Global screenshot service instance
 screenshot_service = ScreenshotService()
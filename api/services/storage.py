@@ -1,88 +1,355 @@
-import json
-import aiofiles
+import asyncio
+import heapq
+import logging
+import msgpack
+import os
+import tempfile
+import orjson
+import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Set, Tuple
 import redis.asyncio as redis
 from ..config.settings import settings
 
+logger = logging.getLogger(__name__)
+
 
 class StorageService:
     """Service for handling file and Redis storage operations."""
     
     def __init__(self):
         self.redis_client: Optional[redis.Redis] = None
+        # Monotonic time before which no new connection attempt is made after a failure
+        self._redis_retry_at = 0.0
+        # Recently served screenshots, least recently used first, bounded by total size
+        self._screenshots: OrderedDict[str, bytes] = OrderedDict()
+        self._screenshots_size = 0
+        # Screenshots served from memory while their file is still being written
+        self._screenshots_saving: Set[str] = set()
+        # Short ID -> (expiry time, link data), least recently used first
+        self._links: OrderedDict[str, Tuple[float, Dict[str, Any]]] = OrderedDict()
+        # Short ID -> task loading it from Redis or disk, shared by concurrent callers
+        self._link_loads: Dict[str, asyncio.Task] = {}
+    
+    async def connect(self) -> Optional[redis.Redis]:
+        """
+        Open the shared Redis connection pool.
+        
+        After a failure get_redis tries again once REDIS_RETRY_INTERVAL has
+        passed, so a Redis that starts after the app is picked up without a restart.
+        
+        Returns:
+            Redis client or None if Redis is unavailable
+        """
+        # Set up front so concurrent get_redis calls do not start their own attempts
+        self._redis_retry_at = time.monotonic() + settings.REDIS_RETRY_INTERVAL
+        client = redis.from_url(
+            settings.REDIS_URL,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
+            health_check_interval=30
+        )
+        try:
+            await client.ping()
+        except Exception as e:
+            await client.aclose()
+            client = None
+            logger.warning("Redis at %s unavailable, using file storage and retrying in %ss: %s",
+                           settings.REDIS_URL, settings.REDIS_RETRY_INTERVAL, e)
+        
+        self.redis_client = client
+        return client
+    
+    async def close(self) -> None:
+        """Close the shared Redis connection pool."""
+        if self.redis_client is not None:
+            await self.redis_client.aclose()
+        self.redis_client = None
+        self._redis_retry_at = 0.0
     
     async def get_redis(self) -> Optional[redis.Redis]:
-        """Get Redis client instance."""
-        if self.redis_client is None:
-            try:
-                self.redis_client = redis.from_url(settings.REDIS_URL)
-                await self.redis_client.ping()
-            except Exception:
-                self.redis_client = None
+        """Get Redis client instance, reconnecting on a backoff while Redis is unavailable."""
+        if self.redis_client is None and time.monotonic() >= self._redis_retry_at:
+            await self.connect()
         return self.redis_client
     
     async def save_short_link(self, short_id: str, data: Dict[str, Any]) -> None:
         """
-        Save short link data to file and optionally Redis.
+        Save short link data to a MessagePack file and optionally Redis.
+        
+        In Redis each link is a hash with one JSON-encoded value per field,
+        so single fields like the click counter can be updated in place.
+        Both copies are written concurrently.
         
         Args:
             short_id: The short link identifier
             data: The link data to save
         """
-        # Save to file
-        file_path = settings.LINKS_DIR / f"{short_id}.json"
-        async with aiofiles.open(file_path, 'w') as f:
-            await f.write(json.dumps(data, indent=2, default=str))
+        writes = [self._save_short_link_file(short_id, data)]
         
         # Save to Redis if available
         redis_client = await self.get_redis()
         if redis_client:
-            try:
-                await redis_client.setex(
-                    f"link:{short_id}",
-                    settings.CACHE_EXPIRY,
-                    json.dumps(data, default=str)
-                )
-            except Exception:
-                pass  # Fallback to file storage
+            writes.append(self._save_short_link_hash(redis_client, short_id, data))
+        
+        # Only the file is required - Redis failures fall back to file storage
+        file_result, *_ = await asyncio.gather(*writes, return_exceptions=True)
+        if isinstance(file_result, BaseException):
+            raise file_result
+        self._remember_link(short_id, data)
     
     async def load_short_link(self, short_id: str) -> Optional[Dict[str, Any]]:
         """
         Load short link data from Redis or file.
         
+        Recently loaded links are served from an in-process cache for
+        LINK_MEMORY_CACHE_TTL seconds, and concurrent misses for the same
+        link share one load. Links found only on disk are copied into Redis
+        so later reads and click updates stay in memory.
+        
         Args:
             short_id: The short link identifier
             
         Returns:
             Dict containing link data or None if not found
         """
+        data = self._get_link_from_memory(short_id)
+        if data is not None:
+            return data
+        
+        task = self._link_loads.get(short_id)
+        if task is None:
+            task = asyncio.create_task(self._load_short_link_uncached(short_id))
+            self._link_loads[short_id] = task
+            task.add_done_callback(lambda _: self._link_loads.pop(short_id, None))
+        
+        return await asyncio.shield(task)
+    
+    async def _load_short_link_uncached(self, short_id: str) -> Optional[Dict[str, Any]]:
+        """Load link data from Redis, or from its file, and cache it in memory."""
         # Try Redis first
         redis_client = await self.get_redis()
         if redis_client:
             try:
-                data = await redis_client.get(f"link:{short_id}")
-                if data:
-                    return json.loads(data)
+                fields = await redis_client.hgetall(f"short_link:{short_id}")
+                if fields:
+                    data = {key.decode(): orjson.loads(value) for key, value in fields.items()}
+                    if "original_url" in data:
+                        self._remember_link(short_id, data)
+                        return data
             except Exception:
                 pass
         
         # Fallback to file
-        file_path = settings.LINKS_DIR / f"{short_id}.json"
-        if file_path.exists():
+        data = await self._load_short_link_file(short_id)
+        if data:
+            if redis_client:
+                try:
+                    await self._save_short_link_hash(redis_client, short_id, data)
+                except Exception:
+                    pass
+            self._remember_link(short_id, data)
+            return data
+        
+        return None
+    
+    async def warm_up_links(self) -> None:
+        """
+        Preload the most recently written short links into the in-process cache.
+        
+        Newly shared links draw the most traffic right after a deploy, so the
+        LINK_WARMUP_COUNT newest link files are loaded at startup - from Redis
+        in one pipeline when available, since it holds the live click counts.
+        Failures are ignored; links then load on first use as usual.
+        """
+        if settings.LINK_WARMUP_COUNT <= 0:
+            return
+        
+        try:
+            short_ids = await asyncio.to_thread(_recent_link_ids, settings.LINKS_DIR, settings.LINK_WARMUP_COUNT)
+            if not short_ids:
+                return
+            
+            redis_client = await self.get_redis()
+            if redis_client:
+                async with redis_client.pipeline(transaction=False) as pipe:
+                    for short_id in short_ids:
+                        pipe.hgetall(f"short_link:{short_id}")
+                    results = await pipe.execute()
+                loaded = [
+                    (short_id, {key.decode(): orjson.loads(value) for key, value in fields.items()})
+                    for short_id, fields in zip(short_ids, results) if fields
+                ]
+            else:
+                loaded = [(short_id, await self._load_short_link_file(short_id)) for short_id in short_ids]
+        except Exception:
+            return
+        
+        # Oldest first, so the newest links end up most recently used
+        for short_id, data in reversed(loaded):
+            if data and "original_url" in data:
+                self._remember_link(short_id, data)
+    
+    async def increment_clicks(self, counts: Dict[str, int]) -> None:
+        """
+        Add accumulated clicks to short link counters.
+        
+        Uses one pipelined batch of atomic HINCRBY calls when Redis is
+        available, otherwise rewrites each link file. With Redis the new
+        totals are also written through to the link files, which stay the
+        durable record if Redis is flushed or evicts a link; links whose
+        hash was missing add their clicks to the file's total instead and
+        are copied back into Redis.
+        
+        Args:
+            counts: Number of new clicks per short link identifier. Entries are
+                removed once written, so after an error only unwritten clicks remain.
+        """
+        redis_client = await self.get_redis()
+        if redis_client:
+            try:
+                async with redis_client.pipeline(transaction=False) as pipe:
+                    for short_id, amount in counts.items():
+                        key = f"short_link:{short_id}"
+                        pipe.hexists(key, "original_url")
+                        pipe.hincrby(key, "clicks", amount)
+                    results = await pipe.execute()
+            except Exception:
+                pass  # Fallback to file storage
+            else:
+                totals = {}
+                for (short_id, amount), existed, total in zip(list(counts.items()), results[::2], results[1::2]):
+                    if existed:
+                        totals[short_id] = total
+                        del counts[short_id]
+                # Keep this worker's cached copies in step with the stored counters
+                for short_id, total in totals.items():
+                    entry = self._links.get(short_id)
+                    if entry is not None:
+                        entry[1]["clicks"] = total
+                await asyncio.gather(*(
+                    self._save_clicks_to_file(short_id, total) for short_id, total in totals.items()
+                ))
+                if not counts:
+                    return
+                # The hash was flushed or evicted, so HINCRBY only left a partial
+                # hash holding these clicks - drop it and count from the file
+                try:
+                    await redis_client.delete(*(f"short_link:{short_id}" for short_id in counts))
+                except Exception:
+                    pass
+        
+        for short_id, amount in list(counts.items()):
+            self._links.pop(short_id, None)  # Reload the stored value, not a cached copy
+            data = await self._load_short_link_file(short_id)
+            if data:
+                data["clicks"] = data.get("clicks", 0) + amount
+                await self.save_short_link(short_id, data)
+            del counts[short_id]
+    
+    async def _save_clicks_to_file(self, short_id: str, total: int) -> None:
+        """Write a click total counted in Redis into the link's file."""
+        data = await self._load_short_link_file(short_id)
+        if data is None:
+            return
+        data["clicks"] = total
+        try:
+            await self._save_short_link_file(short_id, data)
+        except OSError:
+            pass  # Redis still holds the count; the next flush of this link writes it again
+    
+    async def get_cached(self, key: str) -> Optional[bytes]:
+        """
+        Get a cached value from Redis.
+        
+        Args:
+            key: The cache key
+            
+        Returns:
+            Cached bytes or None if missing or Redis is unavailable
+        """
+        redis_client = await self.get_redis()
+        if redis_client:
             try:
-                async with aiofiles.open(file_path, 'r') as f:
-                    content = await f.read()
-                    return json.loads(content)
+                return await redis_client.get(key)
             except Exception:
                 pass
+        return None
+    
+    async def set_cached(self, key: str, value, expiry: Optional[int] = None) -> None:
+        """
+        Store a value in Redis if available.
         
+        Args:
+            key: The cache key
+            value: String or bytes to store
+            expiry: Time to live in seconds, or None to keep indefinitely
+        """
+        redis_client = await self.get_redis()
+        if redis_client:
+            try:
+                await redis_client.set(key, value, ex=expiry)
+            except Exception:
+                pass
+    
+    async def _load_short_link_file(self, short_id: str) -> Optional[Dict[str, Any]]:
+        """Read link data from its sharded MessagePack file, or a legacy unsharded or JSON file."""
+        candidates = (
+            (_link_file_path(short_id), msgpack.unpackb),
+            (settings.LINKS_DIR / f"{short_id}.msgpack", msgpack.unpackb),
+            (settings.LINKS_DIR / f"{short_id}.json", orjson.loads)
+        )
+        for file_path, loads in candidates:
+            try:
+                content = await asyncio.to_thread(file_path.read_bytes)
+            except OSError:
+                continue
+            try:
+                return loads(content)
+            except Exception:
+                return None
         return None
     
+    async def _save_short_link_file(self, short_id: str, data: Dict[str, Any]) -> None:
+        """Write link data to its MessagePack file."""
+        await asyncio.to_thread(_write_file_atomic, _link_file_path(short_id), msgpack.packb(data))
+    
+    async def _save_short_link_hash(self, redis_client: redis.Redis, short_id: str, data: Dict[str, Any]) -> None:
+        """Write link data as a Redis hash of JSON-encoded fields."""
+        await redis_client.hset(
+            f"short_link:{short_id}",
+            mapping={key: orjson.dumps(value) for key, value in data.items()}
+        )
+    
+    def _get_link_from_memory(self, short_id: str) -> Optional[Dict[str, Any]]:
+        """Get fresh link data from the in-process cache."""
+        entry = self._links.get(short_id)
+        if entry is None:
+            return None
+        
+        expires_at, data = entry
+        if expires_at < time.monotonic():
+            del self._links[short_id]
+            return None
+        
+        self._links.move_to_end(short_id)
+        return data
+    
+    def _remember_link(self, short_id: str, data: Dict[str, Any]) -> None:
+        """Add link data to the in-process cache, evicting the least recently used."""
+        self._links[short_id] = (time.monotonic() + settings.LINK_MEMORY_CACHE_TTL, data)
+        self._links.move_to_end(short_id)
+        while len(self._links) > settings.LINK_MEMORY_CACHE_SIZE:
+            self._links.popitem(last=False)
+    
     async def save_screenshot(self, filename: str, image_bytes: bytes) -> Path:
         """
         Save screenshot to cache directory.
         
+        The screenshot is served from memory as soon as this is called,
+        before the file write completes.
+        
         Args:
             filename: The filename to save as
             image_bytes: The image data
@@ -90,14 +357,23 @@ class StorageService:
         Returns:
             Path to the saved file
         """
+        self._remember_screenshot(filename, image_bytes)
         file_path = settings.CACHE_DIR / filename
-        async with aiofiles.open(file_path, 'wb') as f:
-            await f.write(image_bytes)
+        self._screenshots_saving.add(filename)
+        try:
+            # One worker-thread hop for the whole write
+            await asyncio.to_thread(_write_file_atomic, file_path, image_bytes)
+        finally:
+            self._screenshots_saving.discard(filename)
         return file_path
     
     async def load_screenshot(self, filename: str) -> Optional[bytes]:
         """
-        Load screenshot from cache directory.
+        Load screenshot from memory or the cache directory.
+        
+        With several workers a memory hit is only served while the file
+        still exists, since a delete handled by another worker cannot
+        reach this worker's memory copy.
         
         Args:
             filename: The filename to load
@@ -105,14 +381,43 @@ class StorageService:
         Returns:
             Image bytes or None if not found
         """
+        image_bytes = self._screenshots.get(filename)
+        if image_bytes is not None:
+            if (
+                settings.WORKERS > 1
+                and filename not in self._screenshots_saving
+                and not os.path.exists(settings.CACHE_DIR / filename)
+            ):
+                self._forget_screenshot(filename)
+                return None
+            self._screenshots.move_to_end(filename)
+            return image_bytes
+        
         file_path = settings.CACHE_DIR / filename
-        if file_path.exists():
-            try:
-                async with aiofiles.open(file_path, 'rb') as f:
-                    return await f.read()
-            except Exception:
-                pass
-        return None
+        try:
+            image_bytes = await asyncio.to_thread(file_path.read_bytes)
+        except OSError:
+            return None
+        self._remember_screenshot(filename, image_bytes)
+        return image_bytes
+    
+    def _remember_screenshot(self, filename: str, image_bytes: bytes) -> None:
+        """Keep a screenshot in memory, evicting the least recently used beyond the size limit."""
+        self._forget_screenshot(filename)
+        if len(image_bytes) > settings.SCREENSHOT_MEMORY_CACHE_BYTES:
+            return
+        
+        self._screenshots[filename] = image_bytes
+        self._screenshots_size += len(image_bytes)
+        while self._screenshots_size > settings.SCREENSHOT_MEMORY_CACHE_BYTES:
+            _, evicted = self._screenshots.popitem(last=False)
+            self._screenshots_size -= len(evicted)
+    
+    def _forget_screenshot(self, filename: str) -> None:
+        """Drop a screenshot from memory."""
+        image_bytes = self._screenshots.pop(filename, None)
+        if image_bytes is not None:
+            self._screenshots_size -= len(image_bytes)
     
     async def delete_screenshot(self, filename: str) -> bool:
         """
@@ -124,6 +429,7 @@ class StorageService:
         Returns:
             True if deleted successfully, False otherwise
         """
+        self._forget_screenshot(filename)
         file_path = settings.CACHE_DIR / filename
         try:
             if file_path.exists():
@@ -140,14 +446,68 @@ class StorageService:
         Returns:
             Number of files deleted
         """
-        deleted_count = 0
+        self._screenshots.clear()
+        self._screenshots_size = 0
+        return await asyncio.to_thread(_delete_files, settings.CACHE_DIR, ".jpg")
+
+
+def _link_file_path(short_id: str) -> Path:
+    """
+    Path of a short link's file, sharded by the first two characters of its ID.
+    
+    Keeps each directory small so lookups stay fast as the number of links grows.
+    """
+    return settings.LINKS_DIR / short_id[:2] / f"{short_id}.msgpack"
+
+
+def _recent_link_ids(directory: Path, count: int) -> List[str]:
+    """IDs of the most recently modified link files, sharded or not, newest first."""
+    files = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                with os.scandir(entry.path) as shard:
+                    files.extend(item for item in shard if item.name.endswith(".msgpack"))
+            elif entry.name.endswith(".msgpack"):
+                files.append(entry)
+    
+    newest = heapq.nlargest(count, files, key=lambda item: item.stat().st_mtime)
+    return [item.name[:-len(".msgpack")] for item in newest]
+
+
+def _write_file_atomic(file_path: Path, data: bytes) -> None:
+    """Write a file under a temporary name and rename it, so readers never see a partial file."""
+    file_path.parent.mkdir(exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=file_path.parent, prefix=f".{file_path.name}.")
+    try:
         try:
-            for file_path in settings.CACHE_DIR.glob("*.jpg"):
-                file_path.unlink()
-                deleted_count += 1
-        except Exception:
-            pass
-        return deleted_count
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+            os.fchmod(fd, 0o644)
+        finally:
+            os.close(fd)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        Path(temp_path).unlink(missing_ok=True)
+        raise
+
+
+def _delete_files(directory: Path, suffix: str) -> int:
+    """Delete the regular files with a suffix in a directory, returning how many were removed."""
+    deleted_count = 0
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(suffix) and entry.is_file(follow_symlinks=False):
+                    try:
+                        os.unlink(entry.path)
+                        deleted_count += 1
+                    except OSError:
+                        pass
+    except OSError:
+        pass
+    return deleted_count
 
 
 # Global storage service instance
@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import shutil
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from ..config.settings import settings
+
+try:
+    import yt_dlp
+except ImportError:  # Optional - captures fall back to the browser
+    yt_dlp = None
+
+logger = logging.getLogger(__name__)
+
+
+# Video-only (DASH) H.264 stream first - cheapest to decode a single frame from,
+# then any video-only stream, then a combined one
+_FORMAT = "bestvideo[height<=1080][vcodec^=avc1]/bestvideo[height<=1080]/best[height<=1080]"
+
+# Frames are grabbed slightly past the requested time, as the browser player has
+# always done - both capture paths fill the same cache key, so they must agree
+SEEK_OFFSET = 0.6
+
+# Resolved stream URLs expire after a few hours; keep them well inside that
+_STREAM_URL_TTL = 1800
+_STREAM_URL_CACHE_SIZE = 256
+
+# Videos whose stream could not be resolved go straight to the browser for a while
+_FAILURE_TTL = 300
+
+
+def seek_position(timestamp: float) -> float:
+    """Position to capture for a requested timestamp; the start of the video stays at 0."""
+    return timestamp + SEEK_OFFSET if timestamp > 0 else 0.0
+
+
+class YTDLPScreenshotService:
+    """Grab single YouTube frames with yt-dlp and ffmpeg, without a browser."""
+
+    def __init__(self):
+        self._ffmpeg = shutil.which("ffmpeg")
+        # Video ID -> (expiry time, stream URL, request headers), least recently used first
+        self._streams: OrderedDict[str, Tuple[float, str, Dict[str, str]]] = OrderedDict()
+        # Video ID -> time until which resolving is not retried, oldest first
+        self._failures: OrderedDict[str, float] = OrderedDict()
+        # Held until the yt-dlp thread finishes, even after a lookup times out
+        self._resolve_slots = asyncio.Semaphore(settings.DIRECT_CAPTURE_RESOLVE_CONCURRENCY)
+
+    @property
+    def available(self) -> bool:
+        """Whether yt-dlp and ffmpeg are installed and direct capture is enabled."""
+        return settings.DIRECT_CAPTURE and yt_dlp is not None and self._ffmpeg is not None
+
+    async def capture_frame(self, video_id: str, timestamp: float, width: int, height: int) -> Optional[bytes]:
+        """
+        Extract one frame of a YouTube video as a JPEG of the target size.
+
+        ffmpeg seeks the resolved stream with HTTP range requests, so only
+        the segment around the timestamp is downloaded and decoded.
+
+        Args:
+            video_id: YouTube video ID
+            timestamp: Timestamp in seconds
+            width: Frame width
+            height: Frame height
+
+        Returns:
+            JPEG bytes or None if the stream could not be resolved or decoded
+        """
+        try:
+            stream = await self._get_stream(video_id)
+            if stream is None:
+                return None
+            stream_url, headers = stream
+
+            frame = await self._run_ffmpeg(stream_url, headers, timestamp, width, height)
+            if frame is None:
+                # The cached URL may have expired early - resolve again next time
+                self._streams.pop(video_id, None)
+            return frame
+        except Exception as e:
+            logger.info("Direct capture failed for %s: %s", video_id, e)
+            return None
+
+    async def _get_stream(self, video_id: str) -> Optional[Tuple[str, Dict[str, str]]]:
+        """Get the stream URL for a video, resolving it with yt-dlp on a cache miss."""
+        now = time.monotonic()
+        entry = self._streams.get(video_id)
+        if entry is not None and entry[0] > now:
+            self._streams.move_to_end(video_id)
+            return entry[1], entry[2]
+
+        if self._failures.get(video_id, 0.0) > now:
+            return None
+
+        # yt-dlp is blocking - resolve in a worker thread, which keeps running
+        # after a timeout until yt-dlp's own socket timeout ends it
+        await self._resolve_slots.acquire()
+        lookup = asyncio.ensure_future(asyncio.to_thread(self._extract_info, video_id))
+        lookup.add_done_callback(self._lookup_done)
+        try:
+            info = await asyncio.wait_for(asyncio.shield(lookup), settings.DIRECT_CAPTURE_RESOLVE_TIMEOUT)
+        except asyncio.TimeoutError:
+            self._remember_failure(video_id)
+            logger.info("Resolving %s timed out after %ss", video_id, settings.DIRECT_CAPTURE_RESOLVE_TIMEOUT)
+            return None
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self._remember_failure(video_id)
+            raise
+
+        stream_url = info.get("url") if info else None
+        if not stream_url:
+            self._remember_failure(video_id)
+            return None
+
+        headers = info.get("http_headers") or {}
+        self._streams[video_id] = (time.monotonic() + _STREAM_URL_TTL, stream_url, headers)
+        self._streams.move_to_end(video_id)
+        while len(self._streams) > _STREAM_URL_CACHE_SIZE:
+            self._streams.popitem(last=False)
+        return stream_url, headers
+
+    def _lookup_done(self, lookup: asyncio.Future) -> None:
+        """Free the lookup slot once the yt-dlp thread has finished."""
+        self._resolve_slots.release()
+        if not lookup.cancelled():
+            lookup.exception()  # Retrieved so a lookup abandoned after a timeout does not log it
+
+    def _remember_failure(self, video_id: str) -> None:
+        """Skip resolving a video for a while after a failed lookup."""
+        self._failures[video_id] = time.monotonic() + _FAILURE_TTL
+        self._failures.move_to_end(video_id)
+        while len(self._failures) > _STREAM_URL_CACHE_SIZE:
+            self._failures.popitem(last=False)
+
+    @staticmethod
+    def _extract_info(video_id: str) -> Optional[Dict[str, Any]]:
+        """Resolve the best matching video-only stream without downloading it."""
+        options = {
+            "format": _FORMAT,
+            "quiet": True,
+            "no_warnings": True,
+            "skip_download": True,
+            "socket_timeout": settings.DIRECT_CAPTURE_RESOLVE_TIMEOUT
+        }
+        with yt_dlp.YoutubeDL(options) as ydl:
+            return ydl.extract_info(f"https://www.youtube.com/watch?v={video_id}", download=False)
+
+    async def _run_ffmpeg(
+        self,
+        stream_url: str,
+        headers: Dict[str, str],
+        timestamp: float,
+        width: int,
+        height: int
+    ) -> Optional[bytes]:
+        """Decode the frame at the timestamp and encode it as JPEG on stdout."""
+        header_lines = "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+        args = [
+            self._ffmpeg, "-hide_banner", "-loglevel", "error",
+            "-ss", f"{seek_position(timestamp):.3f}",
+        ]
+        if header_lines:
+            args += ["-headers", header_lines]
+        args += [
+            "-i", stream_url,
+            "-frames:v", "1",
+            "-vf", f"scale={width}:{height}",
+            "-f", "image2pipe", "-c:v", "mjpeg", "-q:v", "3",
+            "-"
+        ]
+
+        process = await asyncio.create_subprocess_exec(
+            *args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), settings.DIRECT_CAPTURE_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.info("ffmpeg timed out after %ss", settings.DIRECT_CAPTURE_TIMEOUT)
+            return None
+        finally:
+            # Never leave ffmpeg running after a timeout or cancellation
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+
+        if process.returncode != 0 or not stdout:
+            logger.info("ffmpeg exited with %s: %s", process.returncode, stderr.decode(errors="replace")[-500:])
+            return None
+        return stdout
+
+
+# Global yt-dlp screenshot service instance
+ytdlp_screenshot_service = YTDLPScreenshotService()
@@ -0,0 +1,51 @@
+import re
+from typing import Dict, List
+
+
+# Ad, analytics and consent-manager hosts that only slow page loads down
+TRACKER_HOSTS: List[str] = [
+    'doubleclick.net', 'googlesyndication.com', 'googleadservices.com',
+    'google-analytics.com', 'googletagmanager.com', 'googletagservices.com',
+    'adservice.google.com', 'imasdk.googleapis.com',
+    'facebook.net',
+    'scorecardresearch.com', 'quantserve.com', 'chartbeat.com', 'hotjar.com',
+    'segment.io', 'segment.com', 'mixpanel.com', 'amplitude.com', 'newrelic.com',
+    'nr-data.net', 'sentry.io', 'bugsnag.com',
+    'adnxs.com', 'criteo.com', 'criteo.net', 'taboola.com', 'outbrain.com',
+    'amazon-adsystem.com', 'moatads.com', 'adsrvr.org', 'rubiconproject.com',
+    'pubmatic.com', 'openx.net', 'casalemedia.com', 'teads.tv',
+    'onetrust.com', 'cookielaw.org', 'cookiebot.com', 'consensu.org', 'trustarc.com'
+]
+
+# Ad and playback-beacon endpoints served from YouTube's own hosts
+TRACKER_PATHS: List[str] = [
+    '/api/stats/', '/pagead/', '/ptracking', '/generate_204'
+]
+
+# Matches any URL on a tracker host or its subdomains, or a tracker path on
+# YouTube; compiled once so the browser driver filters requests without
+# calling back into Python
+TRACKER_URL_RE = re.compile(
+    r'^https?://(([^/?#]*\.)?(' + '|'.join(re.escape(host) for host in TRACKER_HOSTS) + r')(:\d+)?([/?#]|$)'
+    r'|([^/?#]*\.)?youtube\.com(:\d+)?(' + '|'.join(re.escape(path) for path in TRACKER_PATHS) + r'))'
+)
+
+# Thumbnail, avatar and web-font hosts plus image and font file extensions -
+# a single video frame never needs them
+STATIC_ASSET_HOSTS: List[str] = [
+    'i.ytimg.com', 'yt3.ggpht.com', 'yt3.googleusercontent.com',
+    'fonts.googleapis.com', 'fonts.gstatic.com'
+]
+
+STATIC_ASSET_URL_RE = re.compile(
+    r'^https?://(([^/?#]*\.)?(' + '|'.join(re.escape(host) for host in STATIC_ASSET_HOSTS) + r')(:\d+)?([/?#]|$)'
+    r'|[^?#]*\.(png|jpe?g|gif|webp|avif|ico|woff2?|ttf|otf)([?#]|$))',
+    re.IGNORECASE
+)
+
+# Pre-answered consent so cookie walls do not replace the player
+CONSENT_COOKIES: List[Dict[str, str]] = [
+    {'name': 'SOCS', 'value': 'CAI', 'domain': '.youtube.com', 'path': '/'},
+    {'name': 'CONSENT', 'value': 'YES+cb', 'domain': '.youtube.com', 'path': '/'},
+    {'name': 'SOCS', 'value': 'CAI', 'domain': '.google.com', 'path': '/'}
+]
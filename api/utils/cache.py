@@ -1,5 +1,20 @@
 import hashlib
+import re
+import secrets
 from typing import Optional
+from ..config.settings import settings
+from .validation import URLValidator
+
+
+# Browser engine tokens found in real human user agents
+_HUMAN_UA_RE = re.compile(
+    r"mozilla|chrome|safari|firefox|edge|opera|webkit|gecko|trident|presto", re.IGNORECASE
+)
+
+# Crawler tokens - link preview fetchers often also claim to be Mozilla
+_BOT_UA_RE = re.compile(
+    r"bot|crawler|spider|facebookexternalhit|whatsapp", re.IGNORECASE
+)
 
 
 class CacheManager:
@@ -10,6 +25,8 @@ class CacheManager:
         """
         Generate a unique cache key for the screenshot.
         
+        Equivalent URLs and timestamps within the same step share a key.
+        
         Args:
             url: Video URL
             timestamp: Timestamp in seconds
@@ -19,11 +36,29 @@ class CacheManager:
         Returns:
             str: Unique cache key
         """
-        # Create a unique string from the parameters
+        # Create a unique string from the normalized parameters
+        url = URLValidator.canonicalize_url(url)
+        timestamp = CacheManager.normalize_timestamp(timestamp)
         cache_string = f"{url}:{timestamp}:{width}:{height}"
         
-        # Generate MD5 hash
-        return hashlib.md5(cache_string.encode()).hexdigest()
+        # 128-bit BLAKE2b - hashlib's built-in implementation, cheaper than OpenSSL MD5 for short keys
+        return hashlib.blake2b(cache_string.encode(), digest_size=16).hexdigest()
+    
+    @staticmethod
+    def normalize_timestamp(timestamp: float) -> float:
+        """
+        Round a timestamp to the nearest SCREENSHOT_TIMESTAMP_STEP.
+        
+        Args:
+            timestamp: Timestamp in seconds
+            
+        Returns:
+            float: The timestamp that is actually captured and cached
+        """
+        step = settings.SCREENSHOT_TIMESTAMP_STEP
+        if step <= 0:
+            return float(timestamp)
+        return round(timestamp / step) * step
     
     @staticmethod
     def generate_short_id() -> str:
@@ -31,10 +66,9 @@ class CacheManager:
         Generate a short ID for links.
         
         Returns:
-            str: 8-character short ID
+            str: 8-character URL-safe short ID from 48 random bits
         """
-        import shortuuid
-        return shortuuid.uuid()[:8]
+        return secrets.token_urlsafe(6)
     
     @staticmethod
     def is_bot_user_agent(user_agent: str) -> bool:
@@ -49,21 +83,12 @@ class CacheManager:
         """
         if not user_agent:
             return True
-            
-        user_agent_lower = user_agent.lower()
         
         # Check if it's definitely a human browser
-        human_patterns = [
-            "mozilla", "chrome", "safari", "firefox", "edge", "opera",
-            "webkit", "gecko", "trident", "presto"
-        ]
-        
         is_human_browser = (
             len(user_agent.strip()) > 20 and
-            any(pattern in user_agent_lower for pattern in human_patterns) and
-            "bot" not in user_agent_lower and
-            "crawler" not in user_agent_lower and
-            "spider" not in user_agent_lower
+            _HUMAN_UA_RE.search(user_agent) is not None and
+            _BOT_UA_RE.search(user_agent) is None
         )
         
         # Default to bot (OpenGraph preview) unless confirmed human browser
@@ -0,0 +1,101 @@
+import atexit
+import copy
+import logging
+import queue
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional, Tuple
+
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+_listener: Optional[QueueListener] = None
+
+
+class DuplicateFilter(logging.Filter):
+    """Drop records repeating the same message within a short window."""
+
+    def __init__(self, window: float = 1.0, max_keys: int = 1024):
+        super().__init__()
+        self.window = window
+        self.max_keys = max_keys
+        self._last_seen: Dict[Tuple[str, int, str], float] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """
+        Decide whether a record is emitted.
+
+        Args:
+            record: The log record
+
+        Returns:
+            bool: False if the same message was logged within the window
+        """
+        now = time.monotonic()
+        key = (record.name, record.levelno, record.getMessage())
+        last = self._last_seen.get(key)
+        if last is not None and now - last < self.window:
+            return False
+
+        if len(self._last_seen) >= self.max_keys:
+            # Forget messages whose window has passed
+            self._last_seen = {k: t for k, t in self._last_seen.items() if now - t < self.window}
+        self._last_seen[key] = now
+        return True
+
+
+class DeferredQueueHandler(QueueHandler):
+    """Queue handler that leaves formatting to the listener's handlers."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Prepare a record for the queue without formatting it.
+
+        QueueHandler.prepare() formats the record (timestamps, tracebacks) in
+        the calling thread; only the message arguments are merged here, so
+        later changes to them cannot alter what gets logged.
+
+        Args:
+            record: The log record
+
+        Returns:
+            logging.LogRecord: A copy of the record with its message resolved
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def configure_logging(level: str = "INFO") -> None:
+    """
+    Send application logs through a queue to a background writer thread.
+
+    Log calls on the event loop only enqueue the record; formatting and
+    stream I/O happen on the listener thread. Repeated messages inside
+    one second are dropped to keep error storms from flooding the output.
+
+    Args:
+        level: Root log level name
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(DuplicateFilter())
+
+    root = logging.getLogger()
+    root.setLevel(level.upper())
+    root.addHandler(queue_handler)
+
+    # httpx logs every metadata fetch at INFO
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
@@ -0,0 +1,113 @@
+import hashlib
+from email.utils import formatdate
+from pathlib import Path
+from typing import Optional
+from starlette.exceptions import HTTPException
+from fastapi import Request
+from fastapi.responses import FileResponse, Response
+from fastapi.staticfiles import StaticFiles
+
+
+# Cached screenshots are keyed by their capture parameters, so a file never changes
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Top-level path segments owned by the API - never answered with the SPA shell
+RESERVED_PREFIXES = frozenset({
+    "api", "screenshot", "shorten", "s", "cache", "health", "metrics", "static", "assets"
+})
+
+
+class IndexPage:
+    """In-memory copy of the SPA shell with validators for conditional requests."""
+
+    def __init__(self, content: bytes):
+        self.content = content
+        self.etag = '"' + hashlib.sha1(content).hexdigest() + '"'
+        self.last_modified = formatdate(usegmt=True)
+        self.headers = {
+            "ETag": self.etag,
+            "Last-Modified": self.last_modified,
+            "Cache-Control": "public, max-age=60, must-revalidate"
+        }
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["IndexPage"]:
+        """
+        Read index.html once at startup.
+
+        Args:
+            path: Path to the built index.html
+
+        Returns:
+            IndexPage or None if the frontend has not been built
+        """
+        try:
+            return cls(path.read_bytes())
+        except OSError:
+            return None
+
+    def response(self, request: Request) -> Response:
+        """
+        Build the response for a request, honouring If-None-Match.
+
+        Args:
+            request: Incoming request
+
+        Returns:
+            304 if the client copy is current, the cached page otherwise
+        """
+        if request.headers.get("if-none-match") == self.etag:
+            return Response(status_code=304, headers=self.headers)
+        return Response(content=self.content, media_type="text/html", headers=self.headers)
+
+
+class SPAStaticFiles(StaticFiles):
+    """Static files for the React build with client-side routing fallback."""
+
+    def __init__(self, *args, index_page: Optional[IndexPage] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.index_page = index_page
+
+    async def get_response(self, path: str, scope):
+        """
+        Serve a file from the build directory, falling back to index.html.
+
+        Args:
+            path: Path relative to the mount point
+            scope: ASGI scope of the request
+
+        Returns:
+            Response for the file or the SPA shell
+        """
+        try:
+            return await super().get_response(path, scope)
+        except HTTPException as e:
+            if e.status_code != 404 or path.partition('/')[0] in RESERVED_PREFIXES:
+                raise
+
+        # Unknown non-API path - let React Router resolve it
+        if self.index_page:
+            return self.index_page.response(Request(scope))
+        return FileResponse(Path(self.directory) / "index.html")
+
+
+class CacheStaticFiles(StaticFiles):
+    """Cached screenshots served straight from disk with immutable caching."""
+
+    async def get_response(self, path: str, scope):
+        """
+        Serve a cached screenshot, accepting keys without the .jpg extension.
+
+        Args:
+            path: Cache key relative to the mount point
+            scope: ASGI scope of the request
+
+        Returns:
+            File response with long-lived caching headers
+        """
+        if not path.endswith('.jpg'):
+            path += '.jpg'
+
+        response = await super().get_response(path, scope)
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
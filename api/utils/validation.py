@@ -1,5 +1,26 @@
-from urllib.parse import urlparse
-from typing import List
+import re
+from functools import lru_cache
+from urllib.parse import ParseResult, parse_qsl, urlencode, urlparse, urlunparse
+from typing import List, Tuple
+
+
+# YouTube video ID in a watch URL query string
+_YOUTUBE_V_RE = re.compile(r'(?:^|&)v=([A-Za-z0-9_-]{11})')
+
+
+@lru_cache(maxsize=4096)
+def _parse_url(url: str) -> Tuple[ParseResult, str]:
+    """
+    Parse a URL once for all validators.
+    
+    Args:
+        url: The URL to parse
+        
+    Returns:
+        Tuple of the parse result and the lowercased host without a www. prefix
+    """
+    parsed = urlparse(url)
+    return parsed, parsed.netloc.lower().removeprefix('www.')
 
 
 class URLValidator:
@@ -20,12 +41,18 @@ class URLValidator:
         'jwplayer.com',
         'kaltura.com'
     ]
+    _SUPPORTED_DOMAIN_SET = frozenset(SUPPORTED_DOMAINS)
+    
+    VIDEO_EXTENSIONS = ('.mp4', '.webm', '.ogg', '.avi', '.mov', '.wmv', '.flv', '.mkv')
     
     @classmethod
+    @lru_cache(maxsize=4096)
     def is_valid_video_url(cls, url: str) -> bool:
         """
         Basic validation for video URLs.
         
+        Results are memoized since validation is a pure function of the URL.
+        
         Args:
             url: The URL to validate
             
@@ -33,7 +60,7 @@ class URLValidator:
             bool: True if the URL appears to be a valid video URL
         """
         try:
-            parsed = urlparse(url)
+            parsed, domain = _parse_url(url)
             
             # Check if URL has a valid scheme
             if parsed.scheme not in ['http', 'https']:
@@ -43,22 +70,14 @@ class URLValidator:
             if not parsed.netloc:
                 return False
             
-            # Check if domain is supported
-            domain = parsed.netloc.lower()
-            
-            # Remove www. prefix for comparison
-            if domain.startswith('www.'):
-                domain = domain[4:]
-            
-            # Check against supported domains
-            for supported_domain in cls.SUPPORTED_DOMAINS:
-                if domain == supported_domain or domain.endswith('.' + supported_domain):
+            # Check the domain and each parent domain against the supported set
+            parts = domain.split('.')
+            for i in range(len(parts) - 1):
+                if '.'.join(parts[i:]) in cls._SUPPORTED_DOMAIN_SET:
                     return True
             
             # Additional checks for common video file extensions
-            path = parsed.path.lower()
-            video_extensions = ['.mp4', '.webm', '.ogg', '.avi', '.mov', '.wmv', '.flv', '.mkv']
-            if any(path.endswith(ext) for ext in video_extensions):
+            if parsed.path.lower().endswith(cls.VIDEO_EXTENSIONS):
                 return True
             
             return False
@@ -66,6 +85,38 @@ class URLValidator:
         except Exception:
             return False
     
+    TRACKING_PARAMS: List[str] = ['fbclid', 'gclid', 'igshid', 'si', 'feature']
+    
+    @classmethod
+    @lru_cache(maxsize=4096)
+    def canonicalize_url(cls, url: str) -> str:
+        """
+        Normalize a URL so equivalent links share cache entries.
+        
+        Lowercases the scheme and host, drops default ports, the fragment
+        and tracking parameters (utm_* and TRACKING_PARAMS).
+        
+        Args:
+            url: The URL to normalize
+            
+        Returns:
+            str: The canonical URL, or the input if it cannot be parsed
+        """
+        try:
+            parsed, _ = _parse_url(url)
+            scheme = parsed.scheme.lower()
+            host = (parsed.hostname or '').lower()
+            if parsed.port and (scheme, parsed.port) not in (('http', 80), ('https', 443)):
+                host = f"{host}:{parsed.port}"
+            
+            query = urlencode([
+                (key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+                if not key.startswith('utm_') and key not in cls.TRACKING_PARAMS
+            ])
+            return urlunparse((scheme, host, parsed.path, parsed.params, query, ''))
+        except ValueError:
+            return url
+    
     @classmethod
     def extract_video_id(cls, url: str) -> str:
         """
@@ -78,19 +129,13 @@ class URLValidator:
             str: The extracted video ID or empty string if not found
         """
         try:
-            parsed = urlparse(url)
-            domain = parsed.netloc.lower()
-            
-            # Remove www. prefix
-            if domain.startswith('www.'):
-                domain = domain[4:]
+            parsed, domain = _parse_url(url)
             
             # YouTube
             if 'youtube.com' in domain:
                 if 'watch' in parsed.path:
-                    from urllib.parse import parse_qs
-                    query_params = parse_qs(parsed.query)
-                    return query_params.get('v', [''])[0]
+                    match = _YOUTUBE_V_RE.search(parsed.query)
+                    return match.group(1) if match else ''
                 elif 'embed' in parsed.path:
                     return parsed.path.split('/')[-1]
             elif 'youtu.be' in domain:
@@ -23,5 +23,6 @@ if __name__ == "__main__":
         host=settings.HOST,
         port=settings.PORT,
         reload=is_development, 
+        workers=None if is_development else settings.WORKERS,
         log_level="info"
     )
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Shared headless Chromium for t1me.it workers
+
+Run once per host, then start the API with
+BROWSER_CDP_ENDPOINT=http://127.0.0.1:9222 so every uvicorn worker opens
+its contexts on this browser instead of launching its own.
+"""
+
+import asyncio
+import os
+from playwright.async_api import async_playwright
+from api.services.browser_pool import launch_options
+
+
+async def main():
+    port = int(os.getenv("BROWSER_CDP_PORT", "9222"))
+
+    async with async_playwright() as p:
+        options = launch_options()
+        options["args"] = options["args"] + [
+            f"--remote-debugging-port={port}",
+            "--remote-debugging-address=127.0.0.1"
+        ]
+        browser = await p.chromium.launch(**options)
+        print(f"Shared browser listening on http://127.0.0.1:{port}")
+
+        # Serve until the process is stopped or the browser exits
+        disconnected = asyncio.Event()
+        browser.on("disconnected", lambda _: disconnected.set())
+        await disconnected.wait()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())